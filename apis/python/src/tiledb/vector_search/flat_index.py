@@ -113,7 +113,9 @@ class FlatIndex(index.Index):
         queries_m = array_to_matrix(np.transpose(queries))
         d, i = query_vq_heap(self._db, queries_m, self._ids, k, nthreads)
 
-        return np.transpose(np.array(d)), np.transpose(np.array(i))
+        return np.transpose(np.array(d, copy=False)), np.transpose(
+            np.array(i, copy=False)
+        )
 
 
 def create(
@@ -2,6 +2,7 @@ import concurrent.futures as futures
 import json
 import os
 import time
+from collections import OrderedDict
 from typing import Any, Mapping, Optional
 
 from tiledb.vector_search import _tiledbvspy as vspy
@@ -14,6 +15,158 @@ MAX_UINT64 = np.iinfo(np.dtype("uint64")).max
 MAX_INT32 = np.iinfo(np.dtype("int32")).max
 MAX_FLOAT_32 = np.finfo(np.dtype("float32")).max
 DATASET_TYPE = "vector_search"
+# Above this many (query, vector) pairs the additions are searched in chunks, so that at most
+# this many distances are held in memory at once. Besides the float32 distances, the matrix
+# products and _topk_sort (int64 argpartition and cumsum, boolean masks) need temporaries of
+# the same shape, for a peak of about 22 bytes per distance, i.e. about 90MB.
+ADDITIONS_GEMM_MAX_DISTANCES = 4 * 1024 * 1024
+# Chunks smaller than this make the matrix products too thin to be worth it. Larger additions,
+# or query batches too large for chunks of this size, use the C++ heap based brute force query.
+ADDITIONS_GEMM_MIN_CHUNK_SIZE = 1024
+ADDITIONS_GEMM_MAX_VECTORS = 1024 * 1024
+# Number of candidates per query, on top of k, whose distances are recomputed exactly after
+# being selected with the (less precise) matrix product distances.
+ADDITIONS_EXTRA_CANDIDATES = 16
+# Update fragments written after the latest ingestion are consolidated once there are more
+# than this many of them.
+MAX_UPDATE_FRAGMENTS = 10
+# Maximum number of query vectors whose results are kept when querying with use_cache=True.
+QUERY_CACHE_MAX_ENTRIES = 4096
+
+
+def _available_cpu_count() -> int:
+    """
+    Returns the number of CPUs this process is allowed to run on.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _isin_sorted(values: np.ndarray, sorted_ids: np.ndarray) -> np.ndarray:
+    """
+    Returns a boolean mask of the values that are in sorted_ids. Unlike np.isin, only the
+    values are searched for with a binary search, the values themselves are never sorted.
+    """
+    if sorted_ids.size == 0:
+        return np.zeros(values.shape, dtype=bool)
+    positions = np.searchsorted(sorted_ids, values)
+    np.minimum(positions, sorted_ids.size - 1, out=positions)
+    return sorted_ids[positions] == values
+
+
+def _topk_sort(d: np.ndarray, i: np.ndarray, k: int):
+    """
+    Returns the k smallest distances of each row (and their ids) sorted in ascending order.
+    Uses a partial selection so that only the k selected columns need to be fully sorted. Ties
+    are resolved in column order, i.e. the result is the same as the first k columns of a
+    stable sort.
+    """
+    if k < d.shape[1]:
+        kth = np.take_along_axis(
+            d, np.argpartition(d, k - 1, axis=1)[:, k - 1 : k], axis=1
+        )
+        smaller = d < kth
+        ties = d == kth
+        needed_ties = k - np.count_nonzero(smaller, axis=1, keepdims=True)
+        selected = smaller | (ties & (np.cumsum(ties, axis=1) <= needed_ties))
+        partition_index = np.nonzero(selected)[1].reshape(d.shape[0], k)
+        d = np.take_along_axis(d, partition_index, axis=1)
+        i = np.take_along_axis(i, partition_index, axis=1)
+    sort_index = np.argsort(d, axis=1, kind="stable")
+    return (
+        np.take_along_axis(d, sort_index, axis=1),
+        np.take_along_axis(i, sort_index, axis=1),
+    )
+
+
+def _batch_l2_topk(queries: np.ndarray, vectors: np.ndarray, ids: np.ndarray, k: int):
+    """
+    Brute force search of vectors by squared L2 distance. Candidates are selected with the
+    distances of all queries computed at once as |q|^2 + |v|^2 - 2 * q.v, so that the bulk of
+    the work is a single BLAS matrix product. That form loses precision through cancellation,
+    so the distances of the candidates are then recomputed exactly as |q - v|^2 before the
+    final top k is taken. Rows are padded with MAX_FLOAT_32 / MAX_UINT64 if there are fewer
+    than k vectors.
+    """
+    vectors = vectors.astype(np.float32, copy=False)
+    distances = (
+        np.einsum("ij,ij->i", queries, queries)[:, np.newaxis]
+        + np.einsum("ij,ij->i", vectors, vectors)[np.newaxis, :]
+        - 2 * (queries @ vectors.T)
+    )
+    candidates = min(k + ADDITIONS_EXTRA_CANDIDATES, vectors.shape[0])
+    _, positions = _topk_sort(
+        distances,
+        np.broadcast_to(np.arange(vectors.shape[0]), distances.shape),
+        candidates,
+    )
+    del distances
+    # Candidates are put back in vector order, so that ties between the exact distances are
+    # resolved in vector order as they are by the C++ queries.
+    positions.sort(axis=1)
+    exact_distances = np.empty(positions.shape, dtype=np.float32)
+    for j in range(candidates):
+        differences = queries - vectors[positions[:, j]]
+        exact_distances[:, j] = np.einsum("ij,ij->i", differences, differences)
+    d, positions = _topk_sort(exact_distances, positions, k)
+    i = ids[positions]
+    if d.shape[1] < k:
+        padding = ((0, 0), (0, k - d.shape[1]))
+        d = np.pad(d, padding, constant_values=MAX_FLOAT_32)
+        i = np.pad(i, padding, constant_values=MAX_UINT64)
+    return d, i
+
+
+def _chunked_batch_l2_topk(
+    queries: np.ndarray,
+    vectors: np.ndarray,
+    ids: np.ndarray,
+    k: int,
+    chunk_size: int,
+):
+    """
+    Runs _batch_l2_topk on contiguous chunks of chunk_size vectors and merges the per chunk
+    results. The chunks are searched one after the other, the matrix products are already
+    parallelized by BLAS.
+    """
+    d, i = _batch_l2_topk(queries, vectors[:chunk_size], ids[:chunk_size], k)
+    for start in range(chunk_size, vectors.shape[0], chunk_size):
+        chunk_d, chunk_i = _batch_l2_topk(
+            queries,
+            vectors[start : start + chunk_size],
+            ids[start : start + chunk_size],
+            k,
+        )
+        # Chunks are merged in order and ties favour the earlier chunk, so the results are
+        # the same as searching all the vectors at once.
+        d, i = _merge_sorted_topk(d, i, chunk_d, chunk_i, k)
+    return d, i
+
+
+def _merge_sorted_topk(
+    d1: np.ndarray, i1: np.ndarray, d2: np.ndarray, i2: np.ndarray, k: int
+):
+    """
+    Merges two sets of results whose rows are already sorted by ascending distance and returns
+    the k closest results of each row. Both inputs must have at least k columns.
+    """
+    nqueries = d1.shape[0]
+    rows = np.arange(nqueries)
+    p1 = np.zeros(nqueries, dtype=np.intp)
+    p2 = np.zeros(nqueries, dtype=np.intp)
+    results_d = np.empty((nqueries, k), dtype=np.result_type(d1, d2))
+    results_i = np.empty((nqueries, k), dtype=np.result_type(i1, i2))
+    for j in range(k):
+        # p1 + p2 == j < k, so neither pointer can run past the end of its input.
+        c1 = d1[rows, p1]
+        c2 = d2[rows, p2]
+        take_first = c1 <= c2
+        results_d[:, j] = np.where(take_first, c1, c2)
+        results_i[:, j] = np.where(take_first, i1[rows, p1], i2[rows, p2])
+        p1 += take_first
+        p2 += ~take_first
+    return results_d, results_i
 
 
 class Index:
@@ -91,20 +244,12 @@ class Index:
                     raise ValueError(
                         "'timestamp' argument expects either int or tuple(start: int, end: int)"
                     )
-                if timestamp[0] is not None:
-                    if timestamp[0] > self.ingestion_timestamps[0]:
-                        self.query_base_array = False
-                        self.update_array_timestamp = timestamp
-                    else:
-                        self.history_index = 0
-                        self.base_size = self.base_sizes[self.history_index]
-                        self.base_array_timestamp = self.ingestion_timestamps[
-                            self.history_index
-                        ]
-                        self.update_array_timestamp = (
-                            self.base_array_timestamp + 1,
-                            timestamp[1],
-                        )
+                if (
+                    timestamp[0] is not None
+                    and timestamp[0] > self.ingestion_timestamps[0]
+                ):
+                    self.query_base_array = False
+                    self.update_array_timestamp = timestamp
                 else:
                     self.history_index = 0
                     self.base_size = self.base_sizes[self.history_index]
@@ -116,34 +261,94 @@ class Index:
                         timestamp[1],
                     )
             elif isinstance(timestamp, int):
+                # ingestion_timestamps is sorted, so binary search for the latest ingestion at
+                # or before timestamp.
                 self.history_index = 0
-                i = 0
-                for ingestion_timestamp in self.ingestion_timestamps:
-                    if ingestion_timestamp <= timestamp:
-                        self.base_array_timestamp = ingestion_timestamp
-                        self.history_index = i
-                        self.base_size = self.base_sizes[self.history_index]
-                    i += 1
+                i = np.searchsorted(self.ingestion_timestamps, timestamp, side="right")
+                if i > 0:
+                    self.history_index = int(i) - 1
+                    self.base_array_timestamp = self.ingestion_timestamps[
+                        self.history_index
+                    ]
+                    self.base_size = self.base_sizes[self.history_index]
                 self.update_array_timestamp = (self.base_array_timestamp + 1, timestamp)
             else:
                 raise TypeError(
                     "Unexpected argument type for 'timestamp' keyword argument"
                 )
-        self.thread_executor = futures.ThreadPoolExecutor()
+        # Queries with updates and inter_query_parallel=True split the available CPUs between
+        # the base index query and the additions query. The executor is only created once it
+        # is needed.
+        self._cpu_count = _available_cpu_count()
+        self._nthreads = max(1, self._cpu_count // 2)
+        self.thread_executor = None
+        # LRU cache of per query vector results, used by query(..., use_cache=True).
+        self._query_cache = OrderedDict()
+        # Only set once the updates array is known to exist, see updates_array_exists().
+        self._updates_array_exists = False
+        # Upper bound on the number of update fragments written after the latest ingestion, or
+        # None if the fragments have not been listed yet. See consolidate_update_fragments().
+        self._update_fragments_count = None
         self.has_updates = self.check_has_updates()
 
-    def query(self, queries: np.ndarray, k, **kwargs):
+    def query(
+        self,
+        queries: np.ndarray,
+        k,
+        inter_query_parallel: bool = False,
+        use_cache: bool = False,
+        **kwargs,
+    ):
         if queries.ndim != 2:
             raise TypeError(
                 f"Expected queries to have 2 dimensions (i.e. [[...], etc.]), but it had {queries.ndim} dimensions"
             )
 
-        query_dimensions = queries.shape[0] if queries.ndim == 1 else queries.shape[1]
+        query_dimensions = queries.shape[1]
         if query_dimensions != self.get_dimensions():
             raise TypeError(
                 f"A query in queries has {query_dimensions} dimensions, but the indexed data had {self.dimensions} dimensions"
             )
 
+        if use_cache:
+            return self._query_with_cache(queries, k, inter_query_parallel, **kwargs)
+        return self._query(queries, k, inter_query_parallel, **kwargs)
+
+    def _query_with_cache(
+        self, queries: np.ndarray, k, inter_query_parallel: bool, **kwargs
+    ):
+        # Results depend on the query vector, k and the query parameters. The cache is cleared
+        # whenever this index writes updates.
+        if queries.shape[0] == 0:
+            # Nothing to look up or cache.
+            return self._query(queries, k, inter_query_parallel, **kwargs)
+        params = (queries.dtype.str, k, tuple(sorted(kwargs.items())))
+        try:
+            hash(params)
+        except TypeError:
+            # Some query parameters (e.g. a resources mapping) can't be part of a cache key.
+            return self._query(queries, k, inter_query_parallel, **kwargs)
+        keys = [(query.tobytes(), params) for query in queries]
+        results = []
+        for key in keys:
+            result = self._query_cache.get(key)
+            if result is not None:
+                self._query_cache.move_to_end(key)
+            results.append(result)
+        missed = np.array([result is None for result in results], dtype=bool)
+        if missed.any():
+            missed_d, missed_i = self._query(
+                queries[missed], k, inter_query_parallel, **kwargs
+            )
+            for j, row in enumerate(np.flatnonzero(missed)):
+                result = (missed_d[j].copy(), missed_i[j].copy())
+                results[row] = result
+                self._query_cache[keys[row]] = result
+            while len(self._query_cache) > QUERY_CACHE_MAX_ENTRIES:
+                self._query_cache.popitem(last=False)
+        return np.stack([d for d, _ in results]), np.stack([i for _, i in results])
+
+    def _query(self, queries: np.ndarray, k, inter_query_parallel: bool, **kwargs):
         with tiledb.scope_ctx(ctx_or_config=self.config):
             if not self.has_updates:
                 if self.query_base_array:
@@ -154,19 +359,31 @@ class Index:
                     )
 
         # Query with updates
-        # Perform the queries in parallel
         retrieval_k = 2 * k
-        kwargs["nthreads"] = int(os.cpu_count() / 2)
-        future = self.thread_executor.submit(
-            Index.query_additions,
+        if inter_query_parallel:
+            # Query the base index and the additions concurrently, splitting the CPUs between
+            # the two queries.
+            nthreads = self._nthreads
+        else:
+            # Query the base index and then the additions, each using all the CPUs, so the
+            # two queries' worker threads don't compete for the same cores.
+            nthreads = self._cpu_count
+        kwargs["nthreads"] = nthreads
+        additions_args = (
             queries,
             k,
             self.dtype,
             self.updates_array_uri,
-            int(os.cpu_count() / 2),
+            nthreads,
             self.update_array_timestamp,
             self.config,
         )
+        future = None
+        if inter_query_parallel:
+            if self.thread_executor is None:
+                # Only the additions query is ever submitted, one at a time.
+                self.thread_executor = futures.ThreadPoolExecutor(max_workers=1)
+            future = self.thread_executor.submit(Index.query_additions, *additions_args)
         if self.query_base_array:
             internal_results_d, internal_results_i = self.query_internal(
                 queries, retrieval_k, **kwargs
@@ -174,45 +391,42 @@ class Index:
         else:
             internal_results_d = np.full((queries.shape[0], k), MAX_FLOAT_32)
             internal_results_i = np.full((queries.shape[0], k), MAX_UINT64)
-        addition_results_d, addition_results_i, updated_ids = future.result()
+        if future is None:
+            addition_results_d, addition_results_i, updated_ids = Index.query_additions(
+                *additions_args
+            )
+        else:
+            addition_results_d, addition_results_i, updated_ids = future.result()
 
         # Filter updated vectors
-        query_id = 0
-        for query in internal_results_i:
-            res_id = 0
-            for res in query:
-                if res in updated_ids:
-                    internal_results_d[query_id, res_id] = MAX_FLOAT_32
-                    internal_results_i[query_id, res_id] = MAX_UINT64
-                res_id += 1
-            query_id += 1
-        sort_index = np.argsort(internal_results_d, axis=1)
-        internal_results_d = np.take_along_axis(internal_results_d, sort_index, axis=1)
-        internal_results_i = np.take_along_axis(internal_results_i, sort_index, axis=1)
+        updated_mask = _isin_sorted(internal_results_i, np.sort(updated_ids))
+        np.putmask(internal_results_d, updated_mask, MAX_FLOAT_32)
+        np.putmask(internal_results_i, updated_mask, MAX_UINT64)
+        internal_results_d, internal_results_i = _topk_sort(
+            internal_results_d, internal_results_i, k
+        )
 
         # Merge update results
         if addition_results_d is None:
-            return internal_results_d[:, 0:k], internal_results_i[:, 0:k]
-
-        query_id = 0
-        for query in addition_results_d:
-            res_id = 0
-            for res in query:
-                if (
-                    addition_results_d[query_id, res_id] == 0
-                    and addition_results_i[query_id, res_id] == 0
-                ):
-                    addition_results_d[query_id, res_id] = MAX_FLOAT_32
-                    addition_results_i[query_id, res_id] = MAX_UINT64
-                res_id += 1
-            query_id += 1
-
-        results_d = np.hstack((internal_results_d, addition_results_d))
-        results_i = np.hstack((internal_results_i, addition_results_i))
-        sort_index = np.argsort(results_d, axis=1)
-        results_d = np.take_along_axis(results_d, sort_index, axis=1)
-        results_i = np.take_along_axis(results_i, sort_index, axis=1)
-        return results_d[:, 0:k], results_i[:, 0:k]
+            return internal_results_d, internal_results_i
+
+        # Results that were not filled in by the additions query come back as (0, 0).
+        empty_mask = (addition_results_d == 0) & (addition_results_i == 0)
+        if empty_mask.any():
+            addition_results_d[empty_mask] = MAX_FLOAT_32
+            addition_results_i[empty_mask] = MAX_UINT64
+            # Move the masked results to the end of their rows so the rows stay sorted.
+            sort_index = np.argsort(empty_mask, axis=1, kind="stable")
+            addition_results_d = np.take_along_axis(addition_results_d, sort_index, 1)
+            addition_results_i = np.take_along_axis(addition_results_i, sort_index, 1)
+
+        return _merge_sorted_topk(
+            internal_results_d,
+            internal_results_i,
+            addition_results_d,
+            addition_results_i,
+            k,
+        )
 
     @staticmethod
     def query_additions(
@@ -231,15 +445,42 @@ class Index:
         if additions_vectors is None:
             return None, None, updated_ids
 
+        if (
+            queries.shape[0] * additions_vectors.shape[0]
+            <= ADDITIONS_GEMM_MAX_DISTANCES
+        ):
+            d, i = _batch_l2_topk(queries, additions_vectors, additions_external_ids, k)
+            return d, i, updated_ids
+        chunk_size = ADDITIONS_GEMM_MAX_DISTANCES // queries.shape[0]
+        if (
+            additions_vectors.shape[0] <= ADDITIONS_GEMM_MAX_VECTORS
+            and chunk_size >= ADDITIONS_GEMM_MIN_CHUNK_SIZE
+        ):
+            d, i = _chunked_batch_l2_topk(
+                queries,
+                additions_vectors,
+                additions_external_ids,
+                k,
+                chunk_size,
+            )
+            return d, i, updated_ids
+
+        # Transposing the C-contiguous inputs gives the Fortran-contiguous views the matrix
+        # conversion expects, so they are only copied once, into the C++ matrices.
         queries_m = array_to_matrix(np.transpose(queries))
         d, i = query_vq_heap_pyarray(
-            array_to_matrix(np.transpose(additions_vectors).astype(dtype)),
+            array_to_matrix(np.transpose(additions_vectors.astype(dtype, copy=False))),
             queries_m,
             StdVector_u64(additions_external_ids),
             k,
             nthreads,
         )
-        return np.transpose(np.array(d)), np.transpose(np.array(i)), updated_ids
+        # Return (nqueries, k) views on the column-major results rather than copies.
+        return (
+            np.transpose(np.array(d, copy=False)),
+            np.transpose(np.array(i, copy=False)),
+            updated_ids,
+        )
 
     @staticmethod
     def read_additions(
@@ -255,15 +496,21 @@ class Index:
             data = q[:]
             updates_array.close()
             updated_ids = data["external_id"]
-            additions_filter = [len(item) > 0 for item in data["vector"]]
-            if len(data["external_id"][additions_filter]) > 0:
-                return (
-                    np.vstack(data["vector"][additions_filter]),
-                    data["external_id"][additions_filter],
-                    updated_ids,
-                )
-            else:
+            # Deletions are stored as empty vectors, additions as non-empty ones.
+            vector_lengths = np.frompyfunc(len, 1, 1)(data["vector"]).astype(np.intp)
+            additions_filter = vector_lengths > 0
+            if not additions_filter.any():
                 return None, None, updated_ids
+            # All additions have the same dimensions, so concatenate them into a single buffer
+            # and reshape, rather than stacking the object array row by row.
+            additions_vectors = np.concatenate(
+                data["vector"][additions_filter].tolist()
+            ).reshape(-1, vector_lengths[additions_filter][0])
+            return (
+                additions_vectors,
+                updated_ids[additions_filter],
+                updated_ids,
+            )
 
     def get_dimensions(self):
         raise NotImplementedError
@@ -272,16 +519,38 @@ class Index:
         raise NotImplementedError
 
     def check_has_updates(self):
-        with tiledb.scope_ctx(ctx_or_config=self.config):
-            array_exists = tiledb.array_exists(self.updates_array_uri)
         if "has_updates" in self.group.meta:
             has_updates = self.group.meta["has_updates"]
         else:
             has_updates = True
-        return array_exists and has_updates
+        if not has_updates:
+            return False
+        with tiledb.scope_ctx(ctx_or_config=self.config):
+            if not self.updates_array_exists():
+                return False
+            fragments_info = tiledb.array_fragments(self.updates_array_uri)
+        # Skip querying the updates array if none of its fragments are visible at the
+        # timestamp range we read updates at.
+        start, end = self.update_array_timestamp
+        for timestamp_range in fragments_info.timestamp_range:
+            if timestamp_range[1] >= start and (
+                end is None or timestamp_range[0] <= end
+            ):
+                return True
+        return False
+
+    def updates_array_exists(self) -> bool:
+        # The updates array is never removed once it has been created, so only a positive
+        # answer is cached and the VFS is not queried again after it.
+        if not self._updates_array_exists:
+            with tiledb.scope_ctx(ctx_or_config=self.config):
+                self._updates_array_exists = tiledb.array_exists(self.updates_array_uri)
+        return self._updates_array_exists
 
     def set_has_updates(self, has_updates: bool = True):
         self.has_updates = has_updates
+        # Cached query results may not reflect the updates being written.
+        self._query_cache.clear()
         if (
             "has_updates" not in self.group.meta
             or self.group.meta["has_updates"] != has_updates
@@ -304,6 +573,22 @@ class Index:
     def update_batch(
         self, vectors: np.ndarray, external_ids: np.array, timestamp: int = None
     ):
+        vectors = np.asarray(vectors)
+        if vectors.dtype != object:
+            if vectors.ndim != 2:
+                raise TypeError(
+                    f"Expected vectors to be an object array of vectors or to have 2 dimensions (i.e. [[...], etc.]), but it had {vectors.ndim} dimensions"
+                )
+            if vectors.shape[1] != self.get_dimensions():
+                raise TypeError(
+                    f"The vectors have {vectors.shape[1]} dimensions, but the indexed data had {self.get_dimensions()} dimensions"
+                )
+            # The vector attribute is written from an object array with one vector per cell, so
+            # wrap the rows of a 2D array of vectors, without copying them.
+            rows = vectors.astype(self.dtype, copy=False)
+            vectors = np.empty((len(rows)), dtype="O")
+            for i in range(len(rows)):
+                vectors[i] = rows[i]
         self.set_has_updates()
         updates_array = self.open_updates_array(timestamp=timestamp)
         updates_array[external_ids] = {"vector": vectors}
@@ -322,25 +607,37 @@ class Index:
     def delete_batch(self, external_ids: np.array, timestamp: int = None):
         self.set_has_updates()
         updates_array = self.open_updates_array(timestamp=timestamp)
+        # Deletions are stored as empty vectors. The write does not modify them, so every
+        # deletion can reference the same empty array.
         deletes = np.empty((len(external_ids)), dtype="O")
-        for i in range(len(external_ids)):
-            deletes[i] = np.array([], dtype=self.dtype)
+        deletes.fill(np.array([], dtype=self.dtype))
         updates_array[external_ids] = {"vector": deletes}
         updates_array.close()
         self.consolidate_update_fragments()
 
     def consolidate_update_fragments(self):
+        # Each write adds a single fragment, so the fragments only need to be listed (a VFS
+        # round trip) once enough writes were made since the last listing for there to be more
+        # than MAX_UPDATE_FRAGMENTS of them.
+        if (
+            self._update_fragments_count is not None
+            and self._update_fragments_count < MAX_UPDATE_FRAGMENTS
+        ):
+            self._update_fragments_count += 1
+            return
         with tiledb.scope_ctx(ctx_or_config=self.config):
             fragments_info = tiledb.array_fragments(self.updates_array_uri)
         count_fragments = 0
         for timestamp_range in fragments_info.timestamp_range:
             if timestamp_range[1] > self.latest_ingestion_timestamp:
                 count_fragments += 1
-        if count_fragments > 10:
+        self._update_fragments_count = count_fragments
+        if count_fragments > MAX_UPDATE_FRAGMENTS:
             conf = tiledb.Config(self.config)
             conf["sm.consolidation.timestamp_start"] = self.latest_ingestion_timestamp
             tiledb.consolidate(self.updates_array_uri, config=conf)
             tiledb.vacuum(self.updates_array_uri, config=conf)
+            self._update_fragments_count = 1
 
     def get_updates_uri(self):
         return self.updates_array_uri
@@ -357,7 +654,7 @@ class Index:
                         f"Updates at a timestamp before the latest_ingestion_timestamp are not supported. "
                         f"timestamp: {timestamp}, latest_ingestion_timestamp: {self.latest_ingestion_timestamp}"
                     )
-            if not tiledb.array_exists(self.updates_array_uri):
+            if not self.updates_array_exists():
                 updates_array_name = storage_formats[self.storage_version][
                     "UPDATES_ARRAY_NAME"
                 ]
@@ -375,6 +672,7 @@ class Index:
                     allows_duplicates=False,
                 )
                 tiledb.Array.create(self.updates_array_uri, updates_schema)
+                self._updates_array_exists = True
                 self.group.close()
                 self.group = tiledb.Group(self.uri, "w")
                 add_to_group(self.group, self.updates_array_uri, updates_array_name)
@@ -106,7 +106,7 @@ def ingest(
         if not provided, centroids are build running kmeans
     training_sample_size: int = -1
         vector sample size to train centroids with,
-        if not provided, is auto-configured based on the dataset sizes
+        if not provided, is auto-configured to min(size, 100 * partitions) vectors
         should not be provided if training_source_uri is provided
     training_input_vectors: numpy Array
         Training input vectors, if this is provided it takes precedence over training_source_uri and training_source_type
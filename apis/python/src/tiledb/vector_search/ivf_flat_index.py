@@ -113,18 +113,39 @@ class IVFFlatIndex(index.Index):
         else:
             self.size = self.base_size
 
-        # TODO pass in a context
         if self.memory_budget == -1:
-            self._db = load_as_matrix(
-                self.db_uri,
-                ctx=self.ctx,
-                config=config,
-                size=self.size,
-                timestamp=self.base_array_timestamp,
-            )
-            self._ids = read_vector_u64(
-                self.ctx, self.ids_uri, 0, self.size, self.base_array_timestamp
-            )
+            self._load_vectors()
+
+    def _load_vectors(self):
+        # TODO pass in a context
+        self._db = load_as_matrix(
+            self.db_uri,
+            ctx=self.ctx,
+            config=self.config,
+            size=self.size,
+            timestamp=self.base_array_timestamp,
+        )
+        self._ids = read_vector_u64(
+            self.ctx, self.ids_uri, 0, self.size, self.base_array_timestamp
+        )
+
+    def set_memory_budget(self, memory_budget: int):
+        """
+        Sets the main memory budget of later queries, without reopening the index.
+
+        Parameters
+        ----------
+        memory_budget: int
+            Main memory budget. If -1, no memory budget is applied and all the vectors are
+            loaded into memory, otherwise they are read from storage at query time.
+        """
+        if memory_budget == -1 and self.memory_budget != -1 and self.size > 0:
+            self._load_vectors()
+        elif memory_budget != -1:
+            # Release the in-memory vectors, queries now read them from storage.
+            self._db = None
+            self._ids = None
+        self.memory_budget = memory_budget
 
     def get_dimensions(self):
         return self.dimensions
@@ -232,7 +253,9 @@ class IVFFlatIndex(index.Index):
                     timestamp=self.base_array_timestamp,
                 )
 
-            return np.transpose(np.array(d)), np.transpose(np.array(i))
+            return np.transpose(np.array(d, copy=False)), np.transpose(
+                np.array(i, copy=False)
+            )
         else:
             return self.taskgraph_query(
                 queries=queries,
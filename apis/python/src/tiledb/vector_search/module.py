@@ -7,6 +7,37 @@ import tiledb
 from tiledb.vector_search import _tiledbvspy as vspy
 from tiledb.vector_search._tiledbvspy import *
 
+# Per dtype implementations of the bindings, looked up with the dtype of the data.
+_TDB_COL_MAJOR_MATRIX = {
+    np.dtype(np.float32): tdbColMajorMatrix_f32,
+    np.dtype(np.int32): tdbColMajorMatrix_i32,
+    np.dtype(np.int64): tdbColMajorMatrix_i64,
+    np.dtype(np.uint8): tdbColMajorMatrix_u8,
+    np.dtype(np.int8): tdbColMajorMatrix_i8,
+}
+_QUERY_VQ_NTH = {
+    np.dtype(np.float32): query_vq_f32,
+    np.dtype(np.uint8): query_vq_u8,
+    np.dtype(np.int8): query_vq_i8,
+}
+_QUERY_VQ_HEAP = {
+    np.dtype(np.float32): vq_query_heap_f32,
+    np.dtype(np.uint8): vq_query_heap_u8,
+    np.dtype(np.int8): vq_query_heap_i8,
+}
+_QUERY_VQ_HEAP_PYARRAY = {
+    np.dtype(np.float32): vq_query_heap_pyarray_f32,
+    np.dtype(np.uint8): vq_query_heap_pyarray_u8,
+    np.dtype(np.int8): vq_query_heap_pyarray_i8,
+}
+_PYARRAY_COPYTO_MATRIX = {
+    np.dtype(np.float32): pyarray_copyto_matrix_f32,
+    np.dtype(np.float64): pyarray_copyto_matrix_f64,
+    np.dtype(np.uint8): pyarray_copyto_matrix_u8,
+    np.dtype(np.uint64): pyarray_copyto_matrix_u64,
+    np.dtype(np.int8): pyarray_copyto_matrix_i8,
+}
+
 
 def load_as_matrix(
     path: str,
@@ -38,22 +69,11 @@ def load_as_matrix(
     dtype = a.attr(0).dtype
     # Read all rows from column 0 -> `size`. Set no upper_bound. Note that if `size` is None then
     # we'll read to the column domain length.
-    if dtype == np.float32:
-        m = tdbColMajorMatrix_f32(ctx, path, 0, None, 0, size, 0, timestamp)
-    elif dtype == np.float64:
-        m = tdbColMajorMatrix_f64(ctx, path, 0, None, 0, size, 0, timestamp)
-    elif dtype == np.int32:
-        m = tdbColMajorMatrix_i32(ctx, path, 0, None, 0, size, 0, timestamp)
-    elif dtype == np.int32:
-        m = tdbColMajorMatrix_i64(ctx, path, 0, None, 0, size, 0, timestamp)
-    elif dtype == np.uint8:
-        m = tdbColMajorMatrix_u8(ctx, path, 0, None, 0, size, 0, timestamp)
-    elif dtype == np.int8:
-        m = tdbColMajorMatrix_i8(ctx, path, 0, None, 0, size, 0, timestamp)
-    # elif dtype == np.uint64:
-    #     return tdbColMajorMatrix_u64(ctx, path, size, timestamp)
-    else:
+    try:
+        tdb_col_major_matrix = _TDB_COL_MAJOR_MATRIX[np.dtype(dtype)]
+    except KeyError:
         raise ValueError("Unsupported Matrix dtype: {}".format(a.attr(0).dtype))
+    m = tdb_col_major_matrix(ctx, path, 0, None, 0, size, 0, timestamp)
     m.load()
     return m
 
@@ -112,14 +132,11 @@ def query_vq_nth(db: "colMajorMatrix", *args):
     args:
         Args for query
     """
-    if db.dtype == np.float32:
-        return query_vq_f32(db, *args)
-    elif db.dtype == np.uint8:
-        return query_vq_u8(db, *args)
-    elif db.dtype == np.int8:
-        return query_vq_i8(db, *args)
-    else:
+    try:
+        query = _QUERY_VQ_NTH[np.dtype(db.dtype)]
+    except KeyError:
         raise TypeError("Unknown type!")
+    return query(db, *args)
 
 
 def query_vq_heap(db: "colMajorMatrix", *args):
@@ -133,14 +150,11 @@ def query_vq_heap(db: "colMajorMatrix", *args):
     args:
         Args for query
     """
-    if db.dtype == np.float32:
-        return vq_query_heap_f32(db, *args)
-    elif db.dtype == np.uint8:
-        return vq_query_heap_u8(db, *args)
-    elif db.dtype == np.int8:
-        return vq_query_heap_i8(db, *args)
-    else:
+    try:
+        query = _QUERY_VQ_HEAP[np.dtype(db.dtype)]
+    except KeyError:
         raise TypeError("Unknown type!")
+    return query(db, *args)
 
 
 def query_vq_heap_pyarray(db: "colMajorMatrix", *args):
@@ -154,14 +168,11 @@ def query_vq_heap_pyarray(db: "colMajorMatrix", *args):
     args:
         Args for query
     """
-    if db.dtype == np.float32:
-        return vq_query_heap_pyarray_f32(db, *args)
-    elif db.dtype == np.uint8:
-        return vq_query_heap_pyarray_u8(db, *args)
-    elif db.dtype == np.int8:
-        return vq_query_heap_pyarray_i8(db, *args)
-    else:
+    try:
+        query = _QUERY_VQ_HEAP_PYARRAY[np.dtype(db.dtype)]
+    except KeyError:
         raise TypeError("Unknown type!")
+    return query(db, *args)
 
 
 def ivf_index_tdb(
@@ -482,20 +493,11 @@ def validate_top_k(results: np.ndarray, ground_truth: np.ndarray):
 
 
 def array_to_matrix(array: np.ndarray):
-    if array.dtype == np.float32:
-        return pyarray_copyto_matrix_f32(array)
-    elif array.dtype == np.float64:
-        return pyarray_copyto_matrix_f64(array)
-    elif array.dtype == np.uint8:
-        return pyarray_copyto_matrix_u8(array)
-    elif array.dtype == np.int32:
-        return pyarray_copyto_matrix_i32(array)
-    elif array.dtype == np.uint64:
-        return pyarray_copyto_matrix_u64(array)
-    elif array.dtype == np.int8:
-        return pyarray_copyto_matrix_i8(array)
-    else:
+    try:
+        pyarray_copyto_matrix = _PYARRAY_COPYTO_MATRIX[array.dtype]
+    except KeyError:
         raise TypeError("Unsupported type!")
+    return pyarray_copyto_matrix(array)
 
 
 def kmeans_fit(
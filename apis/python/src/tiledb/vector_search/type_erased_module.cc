@@ -150,6 +150,15 @@ void init_type_erased_module(py::module_& m) {
           throw std::runtime_error(
               "Incompatible buffer dimension! Should be 1.");
 
+        // The data is copied below with a single memcpy, so have numpy copy
+        // non-contiguous arrays (e.g. strided views) into a contiguous one.
+        if (!(b.flags() & py::array::c_style)) {
+          b = py::array::ensure(b, py::array::c_style);
+          if (!b)
+            throw py::error_already_set();
+          info = b.request();
+        }
+
         auto dtype_str = b.dtype().str();
         tiledb_datatype_t datatype = string_to_datatype(dtype_str);
         if (info.format != datatype_to_format(datatype))
@@ -194,6 +203,9 @@ void init_type_erased_module(py::module_& m) {
       .def("num_vectors", &FeatureVectorArray::num_vectors)
       .def("feature_type", &FeatureVectorArray::feature_type)
       .def("feature_type_string", &FeatureVectorArray::feature_type_string)
+      // np.asarray() returns a view of the C++ storage rather than a copy.
+      // The exported buffer holds a reference to the FeatureVectorArray, so
+      // the view keeps it alive; np.array() still copies by default.
       .def_buffer([](FeatureVectorArray& v) -> py::buffer_info {
         return py::buffer_info(
             v.data(),                           /* Pointer to buffer */
@@ -207,6 +219,33 @@ void init_type_erased_module(py::module_& m) {
                  v.dimension(), /* Strides (in bytes) for each index */
              datatype_to_size(v.feature_type())});
       })
+      .def(
+          "to_numpy",
+          [](py::object self, const std::string& order) {
+            // Returns a view of the storage, which holds one vector per
+            // column.  order="C" matches the buffer protocol (one vector per
+            // row), order="F" is its transpose (one vector per column).
+            auto& v = self.cast<FeatureVectorArray&>();
+            auto dtype = py::dtype(datatype_to_format(v.feature_type()));
+            auto size = datatype_to_size(v.feature_type());
+            if (order == "C") {
+              return py::array(
+                  dtype,
+                  {v.num_vectors(), v.dimension()},
+                  {size * v.dimension(), size},
+                  v.data(),
+                  self);
+            } else if (order == "F") {
+              return py::array(
+                  dtype,
+                  {v.dimension(), v.num_vectors()},
+                  {size, size * v.dimension()},
+                  v.data(),
+                  self);
+            }
+            throw std::runtime_error("Invalid order: expected 'C' or 'F'");
+          },
+          py::arg("order") = "C")
       .def(py::init([](py::array b) {
         /* Request a buffer descriptor from Python */
         py::buffer_info info = b.request();
@@ -223,19 +262,38 @@ void init_type_erased_module(py::module_& m) {
 
         size_t sz = datatype_to_size(datatype);
 
+        // Non-contiguous arrays (e.g. strided views) are stored in the
+        // contiguous layout closest to their strides.
+        bool contiguous = b.flags() & (py::array::c_style | py::array::f_style);
+        bool col_major = (b.flags() & py::array::f_style) ||
+                         (!contiguous && b.strides(0) <= b.strides(1));
+
         auto v = [&]() {
-          auto order = b.flags() & py::array::f_style ? TILEDB_COL_MAJOR :
-                                                        TILEDB_ROW_MAJOR;
-          if (order == TILEDB_COL_MAJOR) {
+          if (col_major) {
             return FeatureVectorArray(info.shape[0], info.shape[1], dtype_str);
           } else {
             return FeatureVectorArray(info.shape[1], info.shape[0], dtype_str);
           }
         }();
 
-        auto data = (uint8_t*)v.data();
-        std::memcpy(
-            data, (uint8_t*)info.ptr, info.shape[0] * info.shape[1] * sz);
+        if (contiguous) {
+          auto data = (uint8_t*)v.data();
+          std::memcpy(
+              data, (uint8_t*)info.ptr, info.shape[0] * info.shape[1] * sz);
+        } else {
+          // Have numpy copy the strided data straight into our storage,
+          // through a view of it with the same shape as the input.
+          auto strides =
+              col_major ?
+                  std::vector<py::ssize_t>{
+                      py::ssize_t(sz), py::ssize_t(sz) * info.shape[0]} :
+                  std::vector<py::ssize_t>{
+                      py::ssize_t(sz) * info.shape[1], py::ssize_t(sz)};
+          auto no_owner = py::capsule(v.data(), [](void*) {});
+          auto view =
+              py::array(b.dtype(), info.shape, strides, v.data(), no_owner);
+          py::module_::import("numpy").attr("copyto")(view, b);
+        }
 
         return v;
       }));
@@ -254,7 +312,12 @@ void init_type_erased_module(py::module_& m) {
       .def(
           "query",
           [](IndexFlatL2& index, FeatureVectorArray& vectors, size_t top_k) {
-            auto r = index.query(vectors, top_k);
+            // The query runs on C++ threads only, so other Python threads
+            // can run meanwhile. The GIL is reacquired to build the result.
+            auto r = [&] {
+              py::gil_scoped_release release;
+              return index.query(vectors, top_k);
+            }();
             return make_python_pair(std::move(r));
           });
 
@@ -1,4 +1,4 @@
-import io
+import os
 
 import numpy as np
 
@@ -22,39 +22,62 @@ def add_to_group(group, uri, name):
 
 
 def _load_vecs_t(uri, dtype, ctx_or_config=None):
-    with tiledb.scope_ctx(ctx_or_config) as ctx:
-        dtype = np.dtype(dtype)
-        vfs = tiledb.VFS(ctx.config())
-        with vfs.open(uri, "rb") as f:
-            d = f.read(-1)
-            raw = np.frombuffer(d, dtype=np.uint8)
-            ndim = raw[:4].view(np.int32)[0]
-
-            elem_nbytes = int(4 + ndim * dtype.itemsize)
-            if raw.size % elem_nbytes != 0:
-                raise ValueError(
-                    f"Mismatched dims to bytes in file {uri}: raw.size: {raw.size}, elem_nbytes: {elem_nbytes}"
-                )
-            # take a view on the whole array as
-            # (ndim, sizeof(t)*ndim), and return the actual elements
-            # return raw.view(np.uint8).reshape((elem_nbytes,-1))[4:,:].view(dtype).reshape((ndim,-1))
-
-            if dtype != np.uint8:
-                return raw.view(np.int32).reshape((-1, ndim + 1))[:, 1:].view(dtype)
-            else:
-                return raw.view(np.uint8).reshape((-1, ndim + 1))[:, 1:].view(dtype)
-            # return raw
+    dtype = np.dtype(dtype)
+    mapped = os.path.isfile(uri)
+    if mapped:
+        # Map local files rather than reading them, so pages are only read when accessed.
+        raw = np.memmap(uri, dtype=np.uint8, mode="r")
+    else:
+        with tiledb.scope_ctx(ctx_or_config) as ctx:
+            vfs = tiledb.VFS(ctx.config())
+            with vfs.open(uri, "rb") as f:
+                raw = np.frombuffer(f.read(-1), dtype=np.uint8)
+    ndim = raw[:4].view(np.int32)[0]
+
+    elem_nbytes = int(4 + ndim * dtype.itemsize)
+    if raw.size % elem_nbytes != 0:
+        raise ValueError(
+            f"Mismatched dims to bytes in file {uri}: raw.size: {raw.size}, elem_nbytes: {elem_nbytes}"
+        )
+    # Every vector is stored as its int32 dimension followed by its elements, so view
+    # the whole file as an array of such records and return the elements.
+    records = raw.view(_vecs_record_dtype(dtype, ndim))
+    # Checking the header of every record would read the whole of a mapped file, so only the
+    # first and last records are checked there.
+    headers = records["ndim"][[0, -1]] if mapped else records["ndim"]
+    if not (headers == ndim).all():
+        raise ValueError(f"Vectors with mismatched dims in file {uri}")
+    return records["vector"]
+
+
+def _vecs_record_dtype(dtype, ndim):
+    return np.dtype([("ndim", "<i4"), ("vector", dtype, (ndim,))])
 
 
 def load_ivecs(uri, ctx_or_config=None):
+    """
+    Loads the vectors of a .ivecs file as a read-only (nvectors, dimensions) array of
+    int32. Local files are memory-mapped, so the returned array is a view of the file, which
+    must not be modified or overwritten while the array is in use.
+    """
     return _load_vecs_t(uri, np.int32, ctx_or_config)
 
 
 def load_fvecs(uri, ctx_or_config=None):
+    """
+    Loads the vectors of a .fvecs file as a read-only (nvectors, dimensions) array of
+    float32. Local files are memory-mapped, so the returned array is a view of the file, which
+    must not be modified or overwritten while the array is in use.
+    """
     return _load_vecs_t(uri, np.float32, ctx_or_config)
 
 
 def load_bvecs(uri, ctx_or_config=None):
+    """
+    Loads the vectors of a .bvecs file as a read-only (nvectors, dimensions) array of
+    uint8. Local files are memory-mapped, so the returned array is a view of the file, which
+    must not be modified or overwritten while the array is in use.
+    """
     return _load_vecs_t(uri, np.uint8, ctx_or_config)
 
 
@@ -64,14 +87,12 @@ def _write_vecs_t(uri, data, dtype, ctx_or_config=None):
         vfs = tiledb.VFS(ctx.config())
         ndim = data.shape[1]
 
-        buffer = io.BytesIO()
-
-        for vector in data:
-            buffer.write(np.array([ndim], dtype=np.int32).tobytes())
-            buffer.write(vector.tobytes())
+        records = np.empty(len(data), dtype=_vecs_record_dtype(dtype, ndim))
+        records["ndim"] = ndim
+        records["vector"] = data
 
         with vfs.open(uri, "wb") as f:
-            f.write(buffer.getvalue())
+            f.write(records.tobytes())
 
 
 def write_ivecs(uri, data, ctx_or_config=None):
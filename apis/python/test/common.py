@@ -1,3 +1,4 @@
+import functools
 import os
 import random
 import shutil
@@ -19,27 +20,13 @@ def xbin_mmap(fname, dtype):
 
 def get_groundtruth_ivec(file, k=None, nqueries=None):
     vfs = tiledb.VFS()
-    vector_values = 1 + k
-    vector_size = vector_values * 4
-    read_size = nqueries
-    read_offset = 0
     with vfs.open(file, "rb") as f:
-        f.seek(read_offset)
-        return (
-            np.delete(
-                np.reshape(
-                    np.frombuffer(
-                        f.read(read_size * vector_size),
-                        count=read_size * vector_values,
-                        dtype=np.int32,
-                    ).astype(np.int32),
-                    (read_size, k + 1),
-                ),
-                0,
-                axis=1,
-            ),
-            None,
-        )
+        # Every row is stored as its int32 length followed by its int32 ids.
+        row_length = int(np.frombuffer(f.read(4), dtype=np.int32)[0])
+        row_dtype = np.dtype([("k", "<i4"), ("ids", "<i4", (row_length,))])
+        f.seek(0)
+        rows = np.frombuffer(f.read(nqueries * row_dtype.itemsize), dtype=row_dtype)
+    return rows["ids"][:, :k], None
 
 
 def get_queries(dataset_dir, dtype, nqueries=None):
@@ -120,6 +107,25 @@ def create_manual_dataset_f32_only_data(data, path, dataset_name="data.f32bin"):
         data.astype("float32").tofile(f)
 
 
+@functools.lru_cache(maxsize=2)
+def random_blobs(nb, d, nq):
+    """
+    Returns nb random points and nq queries drawn from nq blobs. The float32 and uint8 datasets
+    are created from the same points, so they are generated once and the last few are cached.
+    The returned arrays are read-only.
+    """
+    import sklearn.model_selection
+    from sklearn.datasets import make_blobs
+
+    X, _ = make_blobs(n_samples=nb + nq, n_features=d, centers=nq, random_state=1)
+    data, queries = sklearn.model_selection.train_test_split(
+        X, test_size=nq, random_state=1
+    )
+    data.flags.writeable = False
+    queries.flags.writeable = False
+    return data, queries
+
+
 def create_random_dataset_f32(nb, d, nq, k, path):
     """
     Creates a random float32 dataset containing both a dataset and queries against it, and then writes those to disk.
@@ -137,18 +143,12 @@ def create_random_dataset_f32(nb, d, nq, k, path):
     path: str
         Path to write the dataset to
     """
-    import sklearn.model_selection
-    from sklearn.datasets import make_blobs
     from sklearn.neighbors import NearestNeighbors
 
     # print(f"Preparing datasets with {nb} random points and {nq} queries.")
     if not os.path.exists(path):
         os.mkdir(path)
-    X, _ = make_blobs(n_samples=nb + nq, n_features=d, centers=nq, random_state=1)
-
-    data, queries = sklearn.model_selection.train_test_split(
-        X, test_size=nq, random_state=1
-    )
+    data, queries = random_blobs(nb, d, nq)
 
     with open(os.path.join(path, "data.f32bin"), "wb") as f:
         np.array([nb, d], dtype="uint32").tofile(f)
@@ -186,18 +186,12 @@ def create_random_dataset_u8(nb, d, nq, k, path):
     path: str
         Path to write the dataset to
     """
-    import sklearn.model_selection
-    from sklearn.datasets import make_blobs
     from sklearn.neighbors import NearestNeighbors
 
     # print(f"Preparing datasets with {nb} random points and {nq} queries.")
     if not os.path.exists(path):
         os.mkdir(path)
-    X, _ = make_blobs(n_samples=nb + nq, n_features=d, centers=nq, random_state=1)
-
-    data, queries = sklearn.model_selection.train_test_split(
-        X, test_size=nq, random_state=1
-    )
+    data, queries = random_blobs(nb, d, nq)
     data = data.astype("uint8")
     queries = queries.astype("uint8")
 
@@ -263,39 +257,40 @@ def create_array(path: str, data):
 def accuracy(
     result, gt, external_ids_offset=0, updated_ids=None, only_updated_ids=False
 ):
+    result = np.asarray(result)
+    if external_ids_offset != 0:
+        result = result.astype(np.int64) - external_ids_offset
+    elif updated_ids is not None:
+        # updated_ids is a (prev_ids, new_ids) pair of arrays, where new_ids[i] replaced
+        # prev_ids[i].
+        prev_ids, new_ids = (np.asarray(ids, dtype=np.uint64) for ids in updated_ids)
+        found_prev_ids = result[np.isin(result, prev_ids)]
+        if found_prev_ids.size > 0:
+            raise ValueError(f"Found updated id {found_prev_ids[0]} in query results.")
+        is_new_id = np.isin(result, new_ids)
+        if only_updated_ids and not is_new_id.all():
+            raise ValueError(
+                f"Found not_updated_id {result[~is_new_id][0]} in query results while expecting only_updated_ids."
+            )
+        if new_ids.size > 0:
+            # Map the new ids back to the ids they replaced.
+            order = np.argsort(new_ids)
+            new_ids, prev_ids = new_ids[order], prev_ids[order]
+            positions = np.searchsorted(new_ids, result).clip(max=new_ids.size - 1)
+            result = np.where(is_new_id, prev_ids[positions], result)
+    # Count the per-row intersections by comparing every result id with every groundtruth id of
+    # its row. Only the first copy of a repeated result id counts, as with np.intersect1d(), and
+    # rows are compared in blocks to bound the size of the (rows, k, k_gt) comparison.
+    result = np.sort(result.astype(np.int64), axis=1)
+    gt = np.asarray(gt)[: len(result)].astype(np.int64)
+    first_copy = np.ones(result.shape, dtype=bool)
+    first_copy[:, 1:] = result[:, 1:] != result[:, :-1]
     found = 0
-    total = 0
-    if updated_ids is not None:
-        updated_ids_rev = {}
-        for updated_id in updated_ids:
-            updated_ids_rev[updated_ids[updated_id]] = updated_id
-    for i in range(len(result)):
-        if external_ids_offset != 0:
-            temp_result = []
-            for j in range(len(result[i])):
-                temp_result.append(int(result[i][j] - external_ids_offset))
-        elif updated_ids is not None:
-            temp_result = []
-            for j in range(len(result[i])):
-                if result[i][j] in updated_ids:
-                    raise ValueError(
-                        f"Found updated id {result[i][j]} in query results."
-                    )
-                if only_updated_ids:
-                    if result[i][j] not in updated_ids_rev:
-                        raise ValueError(
-                            f"Found not_updated_id {result[i][j]} in query results while expecting only_updated_ids."
-                        )
-                uid = updated_ids_rev.get(result[i][j])
-                if uid is not None:
-                    temp_result.append(int(uid))
-                else:
-                    temp_result.append(result[i][j])
-        else:
-            temp_result = result[i]
-        total += len(temp_result)
-        found += len(np.intersect1d(temp_result, gt[i]))
-    return found / total
+    for start in range(0, len(result), 1024):
+        rows = slice(start, start + 1024)
+        in_gt = (result[rows, :, None] == gt[rows, None, :]).any(axis=2)
+        found += np.count_nonzero(in_gt & first_copy[rows])
+    return found / result.size
 
 
 def check_equals(result_d, result_i, expected_result_d, expected_result_i):
@@ -354,6 +349,22 @@ def move_local_index_to_new_location(index_uri):
     return copied_index_uri
 
 
+def replacement_batch(vectors: np.ndarray, prev_ids: np.ndarray, new_ids: np.ndarray):
+    """
+    Builds the update_batch() inputs that delete each of prev_ids and re-add its vector (the
+    matching row of vectors) under the matching id in new_ids.
+    """
+    external_ids = np.empty((2 * len(prev_ids)), dtype=np.uint64)
+    external_ids[0::2] = prev_ids
+    external_ids[1::2] = new_ids
+    updates = np.empty((2 * len(prev_ids)), dtype="O")
+    updates[0::2].fill(np.array([], dtype=vectors.dtype))
+    additions = updates[1::2]
+    for i, vector in enumerate(vectors):
+        additions[i] = vector
+    return updates, external_ids
+
+
 def quantize_embeddings_int8(
     embeddings: np.ndarray,
 ) -> np.ndarray:
@@ -366,6 +377,17 @@ def quantize_embeddings_int8(
     return ((embeddings - starts) / steps - 128).astype(np.int8)
 
 
+def quantize_embeddings_uint8(
+    embeddings: np.ndarray, starts: np.ndarray, ends: np.ndarray
+) -> np.ndarray:
+    """
+    Scalar quantizes embeddings to uint8, mapping the [starts, ends] range of each dimension to
+    [0, 255].
+    """
+    steps = (ends - starts) / 255
+    return np.clip(np.rint((embeddings - starts) / steps), 0, 255).astype(np.uint8)
+
+
 def setUpCloudToken():
     token = os.getenv("TILEDB_REST_TOKEN")
     if os.getenv("TILEDB_CLOUD_HELPER_VAR"):
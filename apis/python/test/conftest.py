@@ -1,6 +1,15 @@
 import ctypes
 
+import numpy as np
 import pytest
+from array_paths import siftsmall_groundtruth_file
+from array_paths import siftsmall_inputs_file
+from array_paths import siftsmall_query_file
+from common import get_groundtruth_ivec
+
+from tiledb.vector_search.index import Index
+from tiledb.vector_search.ingestion import ingest
+from tiledb.vector_search.utils import load_fvecs
 
 
 # Fails if there is any output to stdout or stderr.
@@ -20,3 +29,58 @@ def no_output(capfd):
         pytest.fail(
             f"Test failed because output was captured. out:\n{out}\nerr:\n{err}"
         )
+
+
+# The session fixtures below hold read-only data and indexes that are shared between tests, while
+# each test writes its own indexes under tmp_path. Under pytest-xdist every worker creates its own
+# copy of the session fixtures in its own tmp_path_factory directory, and CI distributes tests
+# with --dist=loadfile so that the tests of a file share a worker and its fixtures.
+@pytest.fixture(scope="session")
+def random_dataset_dir(tmp_path_factory):
+    """
+    Returns a function that creates a dataset with one of the create_random_dataset_* helpers
+    and returns its directory. Creating a dataset computes its brute force groundtruth, so each
+    set of arguments is only created once per session and shared between tests.
+    """
+    dataset_dirs = {}
+
+    def create(create_random_dataset, nb, d, nq, k):
+        key = (create_random_dataset.__name__, nb, d, nq, k)
+        if key not in dataset_dirs:
+            dataset_dir = str(tmp_path_factory.mktemp("dataset"))
+            create_random_dataset(nb=nb, d=d, nq=nq, k=k, path=dataset_dir)
+            dataset_dirs[key] = dataset_dir
+        return dataset_dirs[key]
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def siftsmall():
+    """
+    Returns the siftsmall (input_vectors, queries, gt_i), with the groundtruth of the first 100
+    neighbors of each query. The files are parsed once per session and the arrays are shared
+    between tests, so tests must not modify them.
+    """
+    input_vectors = np.ascontiguousarray(load_fvecs(siftsmall_inputs_file))
+    queries = np.ascontiguousarray(load_fvecs(siftsmall_query_file))
+    gt_i, _ = get_groundtruth_ivec(siftsmall_groundtruth_file, k=100, nqueries=100)
+    return input_vectors, queries, gt_i
+
+
+@pytest.fixture(scope="session", params=["FLAT", "IVF_FLAT", "VAMANA"])
+def siftsmall_index(request, tmp_path_factory):
+    """
+    Returns the siftsmall input vectors ingested from their fvecs file with 100 partitions. It is
+    ingested once per index type and shared between tests, so tests must not update, move or
+    delete it.
+    """
+    index_uri = str(tmp_path_factory.mktemp("siftsmall") / f"sift10k_{request.param}")
+    yield ingest(
+        index_type=request.param,
+        index_uri=index_uri,
+        source_uri=siftsmall_inputs_file,
+        source_type="FVEC",
+        partitions=100,
+    )
+    Index.delete_index(uri=index_uri, config={})
@@ -4,10 +4,12 @@ from common import *
 import tiledb.vector_search as vs
 from tiledb.vector_search import _tiledbvspy as vspy
 
+RNG = np.random.default_rng(0)
+
 
 def test_load_matrix(tmpdir):
     p = str(tmpdir.mkdir("test").join("test.tdb"))
-    data = np.random.rand(12).astype(np.float32).reshape(3, 4)
+    data = RNG.random((3, 4), dtype=np.float32)
 
     # write some test data with tiledb-py
     create_array(p, data)
@@ -17,7 +19,7 @@ def test_load_matrix(tmpdir):
     assert np.array_equal(m, data)
 
     # mutate and compare again - should match backing data in the C++ Matrix
-    data[0, 0] = np.random.rand(1).astype(np.float32)
+    data[0, 0] = RNG.random(1, dtype=np.float32)
     m[0, 0] = data[0, 0]
     assert np.array_equal(m, data)
     assert np.array_equal(orig_matrix[0, 0], data[0, 0])
@@ -25,7 +27,7 @@ def test_load_matrix(tmpdir):
 
 def test_load_matrix_specify_size(tmpdir):
     p = str(tmpdir.mkdir("test").join("test.tdb"))
-    data = np.random.rand(12).astype(np.float32).reshape(3, 4)
+    data = RNG.random((3, 4), dtype=np.float32)
 
     # write some test data with tiledb-py
     create_array(p, data)
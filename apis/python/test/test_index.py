@@ -16,23 +16,51 @@ from tiledb.vector_search.index import create_metadata
 from tiledb.vector_search.ingestion import ingest
 from tiledb.vector_search.ivf_flat_index import IVFFlatIndex
 from tiledb.vector_search.utils import is_type_erased_index
-from tiledb.vector_search.utils import load_fvecs
 from tiledb.vector_search.vamana_index import VamanaIndex
 
+# Seeded so that the random queries are the same on every run.
+RNG = np.random.default_rng(0)
+
 
 def query_and_check_distances(
     index, queries, k, expected_distances, expected_ids, **kwargs
 ):
-    for _ in range(1):
-        distances, ids = index.query(queries, k=k, **kwargs)
-        assert np.array_equal(ids, expected_ids)
-        assert np.array_equal(distances, expected_distances)
+    distances, ids = index.query(queries, k=k, **kwargs)
+    assert np.array_equal(ids, expected_ids)
+    assert np.array_equal(distances, expected_distances)
 
 
 def query_and_check(index, queries, k, expected, **kwargs):
-    for _ in range(3):
-        result_d, result_i = index.query(queries, k=k, **kwargs)
-        assert expected.issubset(set(result_i[0]))
+    result_d, result_i = index.query(queries, k=k, **kwargs)
+    expected = np.fromiter(expected, dtype=np.uint64, count=len(expected))
+    assert np.isin(expected, result_i[0]).all()
+
+
+QUERY = np.array([[2, 2, 2]], dtype=np.float32)
+# (operation, external ids, ids expected in the top 3 results for QUERY) applied in order to an
+# empty index. Updates write the vector [i, i, i] for id i.
+UPDATE_STEPS = [
+    ("update", [0, 1, 2, 3, 4], {1, 2, 3}),
+    # Move the vectors into the base index, so that the following deletes and updates have to
+    # mask base index results.
+    ("consolidate", None, {1, 2, 3}),
+    ("delete", [1, 3], {0, 2, 4}),
+    ("update", [1, 3], {1, 2, 3}),
+    ("delete", [1, 3], {0, 2, 4}),
+    ("consolidate", None, {0, 2, 4}),
+]
+
+
+def apply_update_step(index, vector_type, operation, external_ids):
+    if operation == "update":
+        external_ids = np.array(external_ids)
+        update_vectors = np.repeat(external_ids, 3).reshape(-1, 3).astype(vector_type)
+        index.update_batch(vectors=update_vectors, external_ids=external_ids)
+    elif operation == "delete":
+        index.delete_batch(external_ids=np.array(external_ids))
+    else:
+        index = index.consolidate_updates()
+    return index
 
 
 def check_default_metadata(
@@ -76,41 +104,13 @@ def test_flat_index(tmp_path):
     uri = os.path.join(tmp_path, "array")
     vector_type = np.dtype(np.uint8)
     index = flat_index.create(uri=uri, dimensions=3, vector_type=vector_type)
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {ind.MAX_UINT64})
+    query_and_check(index, QUERY, 3, {ind.MAX_UINT64})
     check_default_metadata(uri, vector_type, STORAGE_VERSION, "FLAT")
 
-    update_vectors = np.empty([5], dtype=object)
-    update_vectors[0] = np.array([0, 0, 0], dtype=vector_type)
-    update_vectors[1] = np.array([1, 1, 1], dtype=vector_type)
-    update_vectors[2] = np.array([2, 2, 2], dtype=vector_type)
-    update_vectors[3] = np.array([3, 3, 3], dtype=vector_type)
-    update_vectors[4] = np.array([4, 4, 4], dtype=vector_type)
-    index.update_batch(vectors=update_vectors, external_ids=np.array([0, 1, 2, 3, 4]))
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3})
-
-    index = index.consolidate_updates()
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3})
-
-    index.delete_batch(external_ids=np.array([1, 3]))
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4})
-
-    index = index.consolidate_updates()
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4})
-
-    update_vectors = np.empty([2], dtype=object)
-    update_vectors[0] = np.array([1, 1, 1], dtype=vector_type)
-    update_vectors[1] = np.array([3, 3, 3], dtype=vector_type)
-    index.update_batch(vectors=update_vectors, external_ids=np.array([1, 3]))
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3})
-
-    index = index.consolidate_updates()
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3})
-
-    index.delete_batch(external_ids=np.array([1, 3]))
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4})
-
-    index = index.consolidate_updates()
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4})
+    for operation, external_ids, expected in UPDATE_STEPS:
+        index = apply_update_step(index, vector_type, operation, external_ids)
+        query_and_check(index, QUERY, 3, expected)
+        query_and_check(index, QUERY, 3, expected, inter_query_parallel=True)
 
     vfs = tiledb.VFS()
     assert vfs.dir_size(uri) > 0
@@ -125,65 +125,12 @@ def test_ivf_flat_index(tmp_path):
     index = ivf_flat_index.create(
         uri=uri, dimensions=3, vector_type=vector_type, partitions=partitions
     )
-    query_and_check(
-        index,
-        np.array([[2, 2, 2]], dtype=np.float32),
-        3,
-        {ind.MAX_UINT64},
-        nprobe=partitions,
-    )
+    query_and_check(index, QUERY, 3, {ind.MAX_UINT64}, nprobe=partitions)
     check_default_metadata(uri, vector_type, STORAGE_VERSION, "IVF_FLAT")
 
-    update_vectors = np.empty([5], dtype=object)
-    update_vectors[0] = np.array([0, 0, 0], dtype=vector_type)
-    update_vectors[1] = np.array([1, 1, 1], dtype=vector_type)
-    update_vectors[2] = np.array([2, 2, 2], dtype=vector_type)
-    update_vectors[3] = np.array([3, 3, 3], dtype=vector_type)
-    update_vectors[4] = np.array([4, 4, 4], dtype=vector_type)
-    index.update_batch(vectors=update_vectors, external_ids=np.array([0, 1, 2, 3, 4]))
-
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3}, nprobe=partitions
-    )
-
-    index = index.consolidate_updates()
-
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3}, nprobe=partitions
-    )
-
-    index.delete_batch(external_ids=np.array([1, 3]))
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4}, nprobe=partitions
-    )
-
-    index = index.consolidate_updates()
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4}, nprobe=partitions
-    )
-
-    update_vectors = np.empty([2], dtype=object)
-    update_vectors[0] = np.array([1, 1, 1], dtype=vector_type)
-    update_vectors[1] = np.array([3, 3, 3], dtype=vector_type)
-    index.update_batch(vectors=update_vectors, external_ids=np.array([1, 3]))
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3}, nprobe=partitions
-    )
-
-    index = index.consolidate_updates()
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {1, 2, 3}, nprobe=partitions
-    )
-
-    index.delete_batch(external_ids=np.array([1, 3]))
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4}, nprobe=partitions
-    )
-
-    index = index.consolidate_updates()
-    query_and_check(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 3, {0, 2, 4}, nprobe=partitions
-    )
+    for operation, external_ids, expected in UPDATE_STEPS:
+        index = apply_update_step(index, vector_type, operation, external_ids)
+        query_and_check(index, QUERY, 3, expected, nprobe=partitions)
 
     vfs = tiledb.VFS()
     assert vfs.dir_size(uri) > 0
@@ -191,6 +138,23 @@ def test_ivf_flat_index(tmp_path):
     assert vfs.dir_size(uri) == 0
 
 
+def test_ivf_flat_index_set_memory_budget(tmp_path):
+    uri = os.path.join(tmp_path, "array")
+    vectors = RNG.random((1000, 16), dtype=np.float32)
+    index = ingest(
+        index_type="IVF_FLAT", index_uri=uri, input_vectors=vectors, partitions=10
+    )
+    expected_d, expected_i = index.query(vectors[:10], k=5, nprobe=10)
+
+    # Queries give the same results whether the vectors are read from storage or from memory.
+    for memory_budget in [100, -1]:
+        index.set_memory_budget(memory_budget)
+        assert index.memory_budget == memory_budget
+        d, i = index.query(vectors[:10], k=5, nprobe=10)
+        assert np.array_equal(i, expected_i)
+        assert np.allclose(d, expected_d)
+
+
 def test_vamana_index_simple(tmp_path):
     uri = os.path.join(tmp_path, "array")
     dimensions = 3
@@ -199,12 +163,12 @@ def test_vamana_index_simple(tmp_path):
     # Create the index.
     index = vamana_index.create(uri=uri, dimensions=dimensions, vector_type=vector_type)
     assert index.get_dimensions() == dimensions
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {ind.MAX_UINT64})
+    query_and_check(index, QUERY, 3, {ind.MAX_UINT64})
 
     # Open the index.
     index = VamanaIndex(uri=uri)
     assert index.get_dimensions() == dimensions
-    query_and_check(index, np.array([[2, 2, 2]], dtype=np.float32), 3, {ind.MAX_UINT64})
+    query_and_check(index, QUERY, 3, {ind.MAX_UINT64})
 
     vfs = tiledb.VFS()
     assert vfs.dir_size(uri) > 0
@@ -245,9 +209,7 @@ def test_vamana_index(tmp_path):
         vectors=update_vectors,
         external_ids=np.array([0, 1, 2, 3, 4], dtype=np.dtype(np.uint32)),
     )
-    query_and_check_distances(
-        index, np.array([[2, 2, 2]], dtype=np.float32), 2, [[0, 3]], [[2, 1]]
-    )
+    query_and_check_distances(index, QUERY, 2, [[0, 3]], [[2, 1]])
 
     index = index.consolidate_updates()
 
@@ -285,6 +247,95 @@ def test_vamana_index(tmp_path):
     assert vfs.dir_size(uri) == 0
 
 
+def test_query_cache(tmp_path):
+    uri = os.path.join(tmp_path, "array")
+    vector_type = np.dtype(np.uint8)
+    index = flat_index.create(uri=uri, dimensions=3, vector_type=vector_type)
+    update_vectors = np.empty([5], dtype=object)
+    for i in range(5):
+        update_vectors[i] = np.array([i, i, i], dtype=vector_type)
+    index.update_batch(vectors=update_vectors, external_ids=np.array([0, 1, 2, 3, 4]))
+
+    queries = np.array([[2, 2, 2], [4, 4, 4]], dtype=np.float32)
+    expected_d, expected_i = index.query(queries, k=3)
+    query_and_check_distances(index, queries, 3, expected_d, expected_i, use_cache=True)
+
+    # Cached and uncached queries can be mixed in a single batch, and a fully cached batch
+    # gives the same results again.
+    queries = np.array([[4, 4, 4], [0, 0, 0], [2, 2, 2]], dtype=np.float32)
+    expected_d, expected_i = index.query(queries, k=3)
+    for _ in range(2):
+        query_and_check_distances(
+            index, queries, 3, expected_d, expected_i, use_cache=True
+        )
+
+    # Query parameters that can't be hashed bypass the cache.
+    query_and_check_distances(
+        index,
+        queries,
+        3,
+        expected_d,
+        expected_i,
+        use_cache=True,
+        resources={"cpu": "1"},
+    )
+
+    # An empty batch gives the same results as without the cache.
+    queries = np.empty((0, 3), dtype=np.float32)
+    expected_d, expected_i = index.query(queries, k=3)
+    query_and_check_distances(index, queries, 3, expected_d, expected_i, use_cache=True)
+
+    # Updates invalidate the cached results.
+    index.delete_batch(external_ids=np.array([1, 3]))
+    query_and_check(index, QUERY, 3, {0, 2, 4}, use_cache=True)
+
+
+def test_update_batch_vectors(tmp_path):
+    uri = os.path.join(tmp_path, "array")
+    vector_type = np.dtype(np.float32)
+    index = flat_index.create(uri=uri, dimensions=3, vector_type=vector_type)
+
+    # A single vector or vectors with the wrong number of dimensions are rejected.
+    with pytest.raises(TypeError):
+        index.update_batch(
+            vectors=np.array([1, 1, 1], dtype=vector_type),
+            external_ids=np.array([1]),
+        )
+    with pytest.raises(TypeError):
+        index.update_batch(
+            vectors=np.ones((2, 4), dtype=vector_type), external_ids=np.array([1, 2])
+        )
+
+    # Lists of vectors are accepted.
+    index.update_batch(
+        vectors=[[i, i, i] for i in range(5)], external_ids=np.array([0, 1, 2, 3, 4])
+    )
+    query_and_check(index, QUERY, 3, {1, 2, 3})
+
+
+def test_query_added_duplicate(tmp_path):
+    uri = os.path.join(tmp_path, "array")
+    dimensions = 128
+    input_vectors = 100 * RNG.random((1000, dimensions), dtype=np.float32)
+    index = ingest(index_type="FLAT", index_uri=uri, input_vectors=input_vectors)
+
+    # Add a copy of each query among other new vectors. The copies must come back first, at
+    # distance 0, even though the base index holds vectors close to the queries.
+    queries = input_vectors[:10] + RNG.random((10, dimensions), dtype=np.float32)
+    update_vectors = np.concatenate(
+        [100 * RNG.random((100, dimensions), dtype=np.float32), queries]
+    )
+    external_ids = np.arange(1000, 1000 + update_vectors.shape[0])
+    index.update_batch(vectors=update_vectors, external_ids=external_ids)
+    expected_ids = external_ids[100:].astype(np.uint64)
+    for inter_query_parallel in [False, True]:
+        result_d, result_i = index.query(
+            queries, k=10, inter_query_parallel=inter_query_parallel
+        )
+        assert np.array_equal(result_i[:, 0], expected_ids)
+        assert np.array_equal(result_d[:, 0], np.zeros(10, dtype=np.float32))
+
+
 def test_delete_invalid_index(tmp_path):
     # We don't throw with an invalid uri.
     Index.delete_index(uri="invalid_uri", config={})
@@ -306,54 +357,41 @@ def test_delete_index(tmp_path):
         assert "does not exist" in str(error.value)
 
 
-def test_index_with_incorrect_dimensions(tmp_path):
+@pytest.mark.parametrize("index_type", [flat_index, ivf_flat_index, vamana_index])
+def test_index_with_incorrect_dimensions(tmp_path, index_type):
     vfs = tiledb.VFS()
-    indexes = [flat_index, ivf_flat_index, vamana_index]
-    for index_type in indexes:
-        uri = os.path.join(tmp_path, f"array_{index_type.__name__}")
-        index = index_type.create(uri=uri, dimensions=3, vector_type=np.dtype(np.uint8))
+    uri = os.path.join(tmp_path, f"array_{index_type.__name__}")
+    index = index_type.create(uri=uri, dimensions=3, vector_type=np.dtype(np.uint8))
 
-        # Wrong number of dimensions will raise a TypeError.
-        with pytest.raises(TypeError):
-            index.query(np.array(1, dtype=np.float32), k=3)
-        with pytest.raises(TypeError):
-            index.query(np.array([1, 1, 1], dtype=np.float32), k=3)
+    # Wrong number of dimensions will raise a TypeError.
+    for shape in [(), (3,), (1, 1, 3), (1, 1, 1, 3)]:
         with pytest.raises(TypeError):
-            index.query(np.array([[[1, 1, 1]]], dtype=np.float32), k=3)
-        with pytest.raises(TypeError):
-            index.query(np.array([[[[1, 1, 1]]]], dtype=np.float32), k=3)
+            index.query(np.ones(shape, dtype=np.float32), k=3)
 
-        # Okay otherwise.
-        index.query(np.array([[1, 1, 1]], dtype=np.float32), k=3)
+    # Okay otherwise.
+    index.query(np.array([[1, 1, 1]], dtype=np.float32), k=3)
 
-        assert vfs.dir_size(uri) > 0
-        Index.delete_index(uri=uri, config={})
-        assert vfs.dir_size(uri) == 0
+    assert vfs.dir_size(uri) > 0
+    Index.delete_index(uri=uri, config={})
+    assert vfs.dir_size(uri) == 0
 
 
-def test_index_with_incorrect_num_of_query_columns_simple(tmp_path):
-    siftsmall_uri = siftsmall_inputs_file
-    queries_uri = siftsmall_query_file
-    indexes = ["FLAT", "IVF_FLAT", "VAMANA"]
-    for index_type in indexes:
-        index_uri = os.path.join(tmp_path, f"sift10k_flat_{index_type}")
-        index = ingest(
-            index_type=index_type,
-            index_uri=index_uri,
-            source_uri=siftsmall_uri,
-            source_type="FVEC",
-        )
+@pytest.fixture(scope="module")
+def siftsmall_queries(siftsmall):
+    _, queries, _ = siftsmall
+    return queries
 
-        # Wrong number of columns will raise a TypeError.
-        query_shape = (1, 1)
-        with pytest.raises(TypeError):
-            index.query(np.random.rand(*query_shape).astype(np.float32), k=10)
 
-        # Okay otherwise.
-        queries = load_fvecs(queries_uri)
-        index.query(queries, k=10)
+def test_index_with_incorrect_num_of_query_columns_simple(
+    siftsmall_index, siftsmall_queries
+):
+    # Wrong number of columns will raise a TypeError.
+    query_shape = (1, 1)
+    with pytest.raises(TypeError):
+        siftsmall_index.query(RNG.random(query_shape, dtype=np.float32), k=10)
 
-        Index.delete_index(uri=index_uri, config={})
+    # Okay otherwise.
+    siftsmall_index.query(siftsmall_queries, k=10)
 
 
 def test_index_with_incorrect_num_of_query_columns_complex(tmp_path):
@@ -364,24 +402,23 @@ def test_index_with_incorrect_num_of_query_columns_complex(tmp_path):
     size = 1000
     indexes = ["FLAT", "IVF_FLAT", "VAMANA"]
     num_columns_in_vector = [1, 2, 3, 4, 5, 10]
-    for index_type in indexes:
-        for num_columns in num_columns_in_vector:
+    # Queries are slices of a single random vector with enough columns for every case.
+    query_pool = RNG.random((1, max(num_columns_in_vector) + 1), dtype=np.float32)
+    for num_columns in num_columns_in_vector:
+        # The same vectors are ingested by every index type. Only their shape matters here.
+        input_vectors = RNG.random((size, num_columns), dtype=np.float32)
+        for index_type in indexes:
             index_uri = os.path.join(tmp_path, f"array_{index_type}_{num_columns}")
-            dataset_dir = os.path.join(tmp_path, f"dataset_{index_type}_{num_columns}")
-            create_random_dataset_f32_only_data(
-                nb=size, d=num_columns, centers=1, path=dataset_dir
-            )
             index = ingest(
                 index_type=index_type,
                 index_uri=index_uri,
-                source_uri=os.path.join(dataset_dir, "data.f32bin"),
+                input_vectors=input_vectors,
             )
 
             # We have created a dataset with num_columns in each vector. Let's try creating queries
             # with different numbers of columns and confirming incorrect ones will throw.
             for num_columns_for_query in range(1, num_columns + 2):
-                query_shape = (1, num_columns_for_query)
-                query = np.random.rand(*query_shape).astype(np.float32)
+                query = query_pool[:, :num_columns_for_query]
                 if query.shape[1] == num_columns:
                     index.query(query, k=1)
                 else:
@@ -4,11 +4,13 @@ from common import *
 import tiledb.vector_search as vs
 from tiledb.vector_search import _tiledbvspy as vspy
 
+RNG = np.random.default_rng(0)
+
 
 def test_tdbMatrix(tmpdir):
     d = tmpdir.mkdir("test")
     p = str(d.join("test.tdb"))
-    data = np.random.rand(12).astype(np.float32).reshape(3, 4)
+    data = RNG.random((3, 4), dtype=np.float32)
 
     create_array(p, data)
 
@@ -40,7 +42,7 @@ def test_tdbMatrix(tmpdir):
     assert m_array.shape == (0, 0)
 
     m_array2 = np.array(m, copy=False)  # mutable view
-    v = np.random.rand(1).astype(np.float32)
+    v = RNG.random(1, dtype=np.float32)
     m_array2[1, 2] = v
 
     data[1, 2] = v
@@ -52,7 +54,7 @@ def test_tdbMatrix(tmpdir):
 def test_array_to_matrix(tmpdir):
     str(tmpdir.mkdir("test").join("test.tdb"))
 
-    data = np.random.rand(12).astype(np.float32).reshape(3, 4)
+    data = RNG.random((3, 4), dtype=np.float32)
 
     mat = vs.array_to_matrix(data)
     mat_view = np.array(mat, copy=True)  # mutable view
@@ -1,12 +1,38 @@
 import logging
 
 import numpy as np
+import pytest
 from array_paths import *
 
 from tiledb.vector_search import _tiledbvspy as vspy
 from tiledb.vector_search.utils import load_fvecs
 
 ctx = vspy.Ctx({})
+rng = np.random.default_rng(0)
+
+
+# The siftsmall training and query arrays are read once and shared by the index tests below.
+@pytest.fixture(scope="module")
+def training_set():
+    training_set = vspy.FeatureVectorArray(ctx, siftsmall_inputs_uri)
+    assert training_set.feature_type_string() == "float32"
+    return training_set
+
+
+@pytest.fixture(scope="module")
+def query_set():
+    query_set = vspy.FeatureVectorArray(ctx, siftsmall_query_uri)
+    assert query_set.feature_type_string() == "float32"
+    return query_set
+
+
+@pytest.fixture
+def groundtruth_set():
+    # count_intersections() sorts the first k_nn ids of each groundtruth vector in place, so
+    # every test reads its own (small) copy of the groundtruth.
+    groundtruth_set = vspy.FeatureVectorArray(ctx, siftsmall_groundtruth_uri)
+    assert groundtruth_set.feature_type_string() == "uint64"
+    return groundtruth_set
 
 
 def test_construct_FeatureVector():
@@ -26,9 +52,12 @@ def test_feature_vector_to_numpy():
     assert b.shape == (10000,)
     assert b.dtype == np.uint64
 
+    # np.asarray goes through the buffer protocol without copying.
+    assert np.shares_memory(np.asarray(a), np.asarray(a))
+
 
 def test_numpy_to_feature_vector_array_simple():
-    a = np.array(np.random.rand(10000), dtype=np.float32)
+    a = rng.random(10000, dtype=np.float32)
     b = vspy.FeatureVector(a)
     assert a.ndim == 1
     logging.info(a.shape)
@@ -39,7 +68,12 @@ def test_numpy_to_feature_vector_array_simple():
     c = np.array(b)
     assert c.ndim == 1
     assert c.shape == (10000,)
-    assert (a == c).all()
+    assert np.array_equal(a, c)
+
+    # Strided views are copied into a contiguous vector.
+    b = vspy.FeatureVector(a[::2])
+    assert b.dimension() == 5000
+    assert np.array_equal(a[::2], np.asarray(b))
 
 
 def test_construct_FeatureVectorArray():
@@ -72,57 +106,65 @@ def test_feature_vector_array_to_numpy():
     b = np.array(a)
     assert b.shape == (10000, 128)
 
+    b = np.asarray(a)
+    assert b.shape == (10000, 128)
+    assert np.shares_memory(b, np.asarray(a))
+    assert not np.shares_memory(b, np.array(a))
+
+    assert np.array_equal(a.to_numpy(), b)
+    assert np.array_equal(a.to_numpy(order="F"), b.T)
+    assert np.shares_memory(a.to_numpy(order="F"), b)
+
 
 def test_numpy_to_feature_vector_array():
-    a = np.array(np.random.rand(10000, 128), dtype=np.float32)
+    a = rng.random((10000, 128), dtype=np.float32)
     b = vspy.FeatureVectorArray(a)
     logging.info(a.shape)
     logging.info((b.dimension(), b.num_vectors()))
     assert a.shape == (10000, 128)
     assert b.dimension() == 128
     assert b.num_vectors() == 10000
-    assert a.shape == np.array(b).shape
-    assert np.array_equal(a, np.array(b))
+    assert a.shape == np.asarray(b).shape
+    assert np.array_equal(a, np.asarray(b))
 
-    a = np.array(np.random.rand(128, 10000), dtype=np.float32, order="F")
+    a = rng.random((10000, 128), dtype=np.float32).T
     b = vspy.FeatureVectorArray(a)
     logging.info(a.shape)
     logging.info((b.dimension(), b.num_vectors()))
     assert a.shape == (128, 10000)
     assert b.dimension() == 128
     assert b.num_vectors() == 10000
-    # TODO(paris): This should work, but it doesn't.
-    # assert a.shape == np.array(b).shape
-    # assert np.array_equal(a, np.array(b))
+    assert a.shape == b.to_numpy(order="F").shape
+    assert np.array_equal(a, b.to_numpy(order="F"))
 
-    a = np.array(np.random.rand(10000, 128), dtype=np.float32)
+    a = rng.random((10000, 128), dtype=np.float32)
     b = vspy.FeatureVectorArray(a.T)
     logging.info(a.shape)
     logging.info((b.dimension(), b.num_vectors()))
     assert a.shape == (10000, 128)
     assert b.dimension() == 128
     assert b.num_vectors() == 10000
-    assert a.shape == np.array(b).shape
-    assert np.array_equal(a, np.array(b))
+    assert a.shape == np.asarray(b).shape
+    assert np.array_equal(a, np.asarray(b))
 
-    a = np.array(np.random.rand(1000000, 128), dtype=np.uint8)
+    a = rng.integers(0, 256, size=(1000000, 128), dtype=np.uint8)
     b = vspy.FeatureVectorArray(a)
     logging.info(a.shape)
     logging.info((b.dimension(), b.num_vectors()))
     assert a.shape == (1000000, 128)
     assert b.dimension() == 128
     assert b.num_vectors() == 1000000
-    assert a.shape == np.array(b).shape
-    assert np.array_equal(a, np.array(b))
+    assert a.shape == np.asarray(b).shape
+    assert np.array_equal(a, np.asarray(b))
 
-    a = np.array(np.random.rand(10000, 128), dtype=np.float32)
+    a = rng.random((10000, 128), dtype=np.float32)
     b = vspy.FeatureVectorArray(a)
     logging.info(a.shape)
     logging.info((b.dimension(), b.num_vectors()))
-    assert a.shape == np.array(b).shape
-    assert np.array_equal(a, np.array(b))
+    assert a.shape == np.asarray(b).shape
+    assert np.array_equal(a, np.asarray(b))
 
-    a = np.array(np.arange(1, 16, dtype=np.float32).reshape(3, 5), dtype=np.float32)
+    a = np.arange(1, 16, dtype=np.float32).reshape(3, 5)
     assert a.shape == (3, 5)
     assert a.flags.f_contiguous is False
     assert a.flags.c_contiguous is True
@@ -131,9 +173,10 @@ def test_numpy_to_feature_vector_array():
     assert a.flags.f_contiguous is True
     assert a.flags.c_contiguous is False
     b = vspy.FeatureVectorArray(a)
-    # NOTE(paris): It is strange that we have to transpose this output array to have it match the input array. Should investigate this and fix it.
-    assert a.shape == np.transpose(np.array(b)).shape
-    assert np.array_equal(a, np.transpose(np.array(b)))
+    # A column major input is read as one vector per column, so compare it with the column major
+    # view of the storage.
+    assert a.shape == b.to_numpy(order="F").shape
+    assert np.array_equal(a, b.to_numpy(order="F"))
 
     n = 99
     a = load_fvecs(siftsmall_query_file)[0:n]
@@ -144,12 +187,12 @@ def test_numpy_to_feature_vector_array():
     assert a.shape == (128, n)
     assert a.flags.f_contiguous is False
     assert a.flags.c_contiguous is False
-    # NOTE(paris): load_fvecs() returns a view of an array, which is not contiguous, so make it contiguous. Ideally we would handle this in FeatureVectorArray().
-    a = np.asfortranarray(a)
+    # load_fvecs() returns a strided view, which FeatureVectorArray() copies into the contiguous
+    # layout closest to its strides (here column major, as for np.asfortranarray(a)).
     b = vspy.FeatureVectorArray(a)
-    # NOTE(paris): It is strange that we have to transpose this output array to have it match the input array. Should investigate this and fix it.
-    assert a.shape == np.transpose(np.array(b)).shape
-    assert np.array_equal(a, np.transpose(np.array(b)))
+    # As above, compare with the column major view of the storage.
+    assert a.shape == b.to_numpy(order="F").shape
+    assert np.array_equal(a, b.to_numpy(order="F"))
 
 
 def test_construct_IndexFlatL2():
@@ -158,13 +201,13 @@ def test_construct_IndexFlatL2():
     assert a.dimension() == 128
 
 
-def test_query_IndexFlatL2():
+def test_query_IndexFlatL2(query_set, groundtruth_set):
     k_nn = 10
     num_queries = 100
 
     a = vspy.IndexFlatL2(ctx, siftsmall_inputs_uri)
-    q = vspy.FeatureVectorArray(ctx, siftsmall_query_uri)
-    gt = vspy.FeatureVectorArray(ctx, siftsmall_groundtruth_uri)
+    q = query_set
+    gt = groundtruth_set
     assert a.feature_type_string() == "float32"
     assert a.dimension() == 128
     assert q.feature_type_string() == "float32"
@@ -184,11 +227,11 @@ def test_query_IndexFlatL2():
 
     logging.info(type(aq_top_k))
 
-    u = np.array(aq_top_k)
-    v = np.array(gt)
+    u = np.asarray(aq_top_k)
+    v = np.asarray(gt)
     logging.info(f"u.shape={u.shape}, v.shape={v.shape}")
     logging.info(f"u.dtype={u.dtype}, v.dtype={v.dtype}")
-    assert (u == v[:, 0:k_nn]).all()
+    assert np.array_equal(u, v[:, 0:k_nn])
 
 
 def test_construct_IndexVamana():
@@ -221,7 +264,9 @@ def test_construct_IndexVamana():
     assert a.dimension() == 0
 
 
-def test_construct_IndexVamana_with_empty_vector(tmp_path):
+def test_construct_IndexVamana_with_empty_vector(
+    tmp_path, training_set, query_set, groundtruth_set
+):
     opt_l = 100
     k_nn = 10
     index_uri = os.path.join(tmp_path, "array")
@@ -243,13 +288,6 @@ def test_construct_IndexVamana_with_empty_vector(tmp_path):
 
     # Then load it again, retrain, and query.
     a = vspy.IndexVamana(ctx, index_uri)
-    training_set = vspy.FeatureVectorArray(ctx, siftsmall_inputs_uri)
-    assert training_set.feature_type_string() == "float32"
-    query_set = vspy.FeatureVectorArray(ctx, siftsmall_query_uri)
-    assert query_set.feature_type_string() == "float32"
-    groundtruth_set = vspy.FeatureVectorArray(ctx, siftsmall_groundtruth_uri)
-    assert groundtruth_set.feature_type_string() == "uint64"
-
     a.train(training_set)
 
     s, t = a.query(query_set, k_nn, opt_l)
@@ -260,7 +298,7 @@ def test_construct_IndexVamana_with_empty_vector(tmp_path):
     assert recall == 1.0
 
 
-def test_inplace_build_query_IndexVamana():
+def test_inplace_build_query_IndexVamana(training_set, query_set, groundtruth_set):
     opt_l = 100
     k_nn = 10
 
@@ -268,13 +306,6 @@ def test_inplace_build_query_IndexVamana():
         id_type="uint32", adjacency_row_index_type="uint32", feature_type="float32"
     )
 
-    training_set = vspy.FeatureVectorArray(ctx, siftsmall_inputs_uri)
-    assert training_set.feature_type_string() == "float32"
-    query_set = vspy.FeatureVectorArray(ctx, siftsmall_query_uri)
-    assert query_set.feature_type_string() == "float32"
-    groundtruth_set = vspy.FeatureVectorArray(ctx, siftsmall_groundtruth_uri)
-    assert groundtruth_set.feature_type_string() == "uint64"
-
     a.train(training_set)
     s, t = a.query(query_set, k_nn, opt_l)
 
@@ -308,24 +339,16 @@ def test_construct_IndexIVFFlat():
     assert a.px_type_string() == "uint64"
 
 
-def test_inplace_build_infinite_query_IndexIVFFlat():
+def test_inplace_build_infinite_query_IndexIVFFlat(
+    training_set, query_set, groundtruth_set
+):
     k_nn = 10
-    nprobe = 32
 
-    for nprobe in [8, 32]:
-        a = vspy.IndexIVFFlat(id_type="uint32", px_type="uint32")
+    a = vspy.IndexIVFFlat(id_type="uint32", px_type="uint32")
+    a.train(training_set, "random")
+    a.add(training_set)
 
-        training_set = vspy.FeatureVectorArray(ctx, siftsmall_inputs_uri)
-        assert training_set.feature_type_string() == "float32"
-
-        query_set = vspy.FeatureVectorArray(ctx, siftsmall_query_uri)
-        assert query_set.feature_type_string() == "float32"
-
-        groundtruth_set = vspy.FeatureVectorArray(ctx, siftsmall_groundtruth_uri)
-        assert groundtruth_set.feature_type_string() == "uint64"
-
-        a.train(training_set, "random")
-        a.add(training_set)
+    for nprobe in [8, 32]:
         s, t = a.query_infinite_ram(query_set, k_nn, nprobe)
 
         intersections = vspy.count_intersections(t, groundtruth_set, k_nn)
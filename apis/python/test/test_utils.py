@@ -3,6 +3,7 @@ import os
 import numpy as np
 from array_paths import *
 
+from tiledb.vector_search.utils import load_bvecs
 from tiledb.vector_search.utils import load_fvecs
 from tiledb.vector_search.utils import load_ivecs
 from tiledb.vector_search.utils import write_fvecs
@@ -34,3 +35,14 @@ def test_load_and_write_vecs(tmp_path):
     new_ivecs = load_ivecs(ivecs_uri)
     assert new_ivecs.shape == (10, 100)
     assert not np.any(np.isnan(ivecs))
+
+
+def test_load_bvecs(tmp_path):
+    bvecs_uri = os.path.join(tmp_path, "bvecs")
+    bvecs = np.arange(30, dtype=np.uint8).reshape(10, 3)
+    with open(bvecs_uri, "wb") as f:
+        for vector in bvecs:
+            f.write(np.array([3], dtype=np.int32).tobytes())
+            f.write(vector.tobytes())
+
+    assert np.array_equal(load_bvecs(bvecs_uri), bvecs)
@@ -30,7 +30,7 @@
  * C++ functions for computing L2 distance between two feature vectors, using
  * AVX intrinsics
  *
- * @todo The loops can be unrolled to improve performance
+ * @todo The mixed float / uint8_t loops can be unrolled as well
  * @todo Implement "view" versions
  */
 
@@ -54,14 +54,44 @@ inline float avx2_sum_of_squares(const V& a, const W& b) {
   // @todo Align on 256 bit boundaries
   const size_t start = 0;
   const size_t size_a = size(a);
+  const size_t stop_32 = size_a - (size_a % 32);
   const size_t stop = size_a - (size_a % 8);
 
   const float* a_ptr = a.data();
   const float* b_ptr = b.data();
 
-  __m256 vec_sum = _mm256_setzero_ps();
+  // Use four independent accumulators so that consecutive fmadds do not
+  // wait on each other (a single accumulator is bound by fmadd latency).
+  __m256 vec_sum_0 = _mm256_setzero_ps();
+  __m256 vec_sum_1 = _mm256_setzero_ps();
+  __m256 vec_sum_2 = _mm256_setzero_ps();
+  __m256 vec_sum_3 = _mm256_setzero_ps();
+
+  for (size_t i = start; i < stop_32; i += 32) {
+    // Load 4 x 8 floats
+    __m256 vec_a_0 = _mm256_loadu_ps(a_ptr + i + 0);
+    __m256 vec_a_1 = _mm256_loadu_ps(a_ptr + i + 8);
+    __m256 vec_a_2 = _mm256_loadu_ps(a_ptr + i + 16);
+    __m256 vec_a_3 = _mm256_loadu_ps(a_ptr + i + 24);
+    __m256 vec_b_0 = _mm256_loadu_ps(b_ptr + i + 0);
+    __m256 vec_b_1 = _mm256_loadu_ps(b_ptr + i + 8);
+    __m256 vec_b_2 = _mm256_loadu_ps(b_ptr + i + 16);
+    __m256 vec_b_3 = _mm256_loadu_ps(b_ptr + i + 24);
+
+    // Compute differences
+    __m256 diff_0 = _mm256_sub_ps(vec_a_0, vec_b_0);
+    __m256 diff_1 = _mm256_sub_ps(vec_a_1, vec_b_1);
+    __m256 diff_2 = _mm256_sub_ps(vec_a_2, vec_b_2);
+    __m256 diff_3 = _mm256_sub_ps(vec_a_3, vec_b_3);
 
-  for (size_t i = start; i < stop; i += 8) {
+    // Square and accumulate
+    vec_sum_0 = _mm256_fmadd_ps(diff_0, diff_0, vec_sum_0);
+    vec_sum_1 = _mm256_fmadd_ps(diff_1, diff_1, vec_sum_1);
+    vec_sum_2 = _mm256_fmadd_ps(diff_2, diff_2, vec_sum_2);
+    vec_sum_3 = _mm256_fmadd_ps(diff_3, diff_3, vec_sum_3);
+  }
+
+  for (size_t i = stop_32; i < stop; i += 8) {
     // Load 8 floats
     __m256 vec_a = _mm256_loadu_ps(a_ptr + i + 0);
     __m256 vec_b = _mm256_loadu_ps(b_ptr + i + 0);
@@ -69,19 +99,13 @@ inline float avx2_sum_of_squares(const V& a, const W& b) {
     // Compute difference
     __m256 diff = _mm256_sub_ps(vec_a, vec_b);
 
-    // Two alternatives for squaring and accumulating -- 2nd seems faster
-#if 0
-    // Compute square
-    __m256 squared_diff = _mm256_mul_ps(diff, diff);
-
-    // Accumulate
-    vec_sum = _mm256_add_ps(vec_sum, squared_diff);
-#else
     // Square and accumulate
-    vec_sum = _mm256_fmadd_ps(diff, diff, vec_sum);
-#endif
+    vec_sum_0 = _mm256_fmadd_ps(diff, diff, vec_sum_0);
   }
 
+  __m256 vec_sum = _mm256_add_ps(
+      _mm256_add_ps(vec_sum_0, vec_sum_1), _mm256_add_ps(vec_sum_2, vec_sum_3));
+
   // 8 to 4
   __m128 lo = _mm256_castps256_ps128(vec_sum);
   __m128 hi = _mm256_extractf128_ps(vec_sum, 1);
@@ -230,55 +254,69 @@ template <class V, class W>
            std::same_as<typename W::value_type, uint8_t>
 inline float avx2_sum_of_squares(const V& a, const W& b) {
   // @todo Align on 256 bit boundaries
-  const size_t start = 0;
+  size_t start = 0;
   const size_t size_a = size(a);
-  const size_t stop = size_a - (size_a % 8);
+  const size_t stop = size_a - (size_a % 16);
 
   const uint8_t* a_ptr = a.data();
   const uint8_t* b_ptr = b.data();
 
-  __m256 vec_sum = _mm256_setzero_ps();
+  // Differences and squares are computed exactly in integer arithmetic, 16
+  // elements at a time.  Each 32 bit lane accumulates at most 2 * 255^2 per
+  // iteration, so it cannot overflow for any realistic dimension.
+  __m256i vec_sum = _mm256_setzero_si256();
 
-  for (size_t i = start; i < stop; i += 8) {
-    // Load 8 bytes == 64 bits -- zeros out top 8 bytes
-    __m128i vec_a = _mm_loadu_si64((__m64*)(a_ptr + i));
-    __m128i vec_b = _mm_loadu_si64((__m64*)(b_ptr + i));
+#ifdef __AVX512BW__
+  // Same computation, 32 elements at a time, when AVX-512 is available.
+  const size_t stop_32 = size_a - (size_a % 32);
+  __m512i vec_sum_512 = _mm512_setzero_si512();
 
-    // Zero extend 8bit to 32bit ints
-    __m256i a_ints = _mm256_cvtepu8_epi32(vec_a);
-    __m256i b_ints = _mm256_cvtepu8_epi32(vec_b);
+  for (size_t i = start; i < stop_32; i += 32) {
+    // Load 32 bytes and zero extend 8bit to 16bit ints
+    __m512i a_shorts =
+        _mm512_cvtepu8_epi16(_mm256_loadu_si256((__m256i*)(a_ptr + i)));
+    __m512i b_shorts =
+        _mm512_cvtepu8_epi16(_mm256_loadu_si256((__m256i*)(b_ptr + i)));
 
-    // Two alternatives for computing difference - 2nd seems faster
-#if 0
-    // Convert signed integers to floats
-    __m256 a_floats = _mm256_cvtepi32_ps(a_ints);
-    __m256 b_floats = _mm256_cvtepi32_ps(b_ints);
+    __m512i diff = _mm512_sub_epi16(a_shorts, b_shorts);
 
-    // Subtract floats
-    __m256i diff = _mm256_sub_ps(a_floats, b_floats);
+#ifdef __AVX512VNNI__
+    // Square, add adjacent pairs, and accumulate in one instruction
+    vec_sum_512 = _mm512_dpwssd_epi32(vec_sum_512, diff, diff);
 #else
-    // Subtract signed integers
-    __m256 i_diff = _mm256_sub_epi32(a_ints, b_ints);
+    vec_sum_512 = _mm512_add_epi32(vec_sum_512, _mm512_madd_epi16(diff, diff));
+#endif
+  }
 
-    // Convert integers to floats
-    __m256 diff = _mm256_cvtepi32_ps(i_diff);
+  // 16 to 8
+  vec_sum = _mm256_add_epi32(
+      _mm512_castsi512_si256(vec_sum_512),
+      _mm512_extracti64x4_epi64(vec_sum_512, 1));
+  start = stop_32;
 #endif
 
-    // Two alternatives for squaring and accumulating  -- 2nd seems faster
-#if 0
-    // Square and add in two steps
-    __m256 diff_2 = _mm256_mul_ps(diff, diff);
-    vec_sum = _mm256_add_ps(vec_sum, diff_2);
+  for (size_t i = start; i < stop; i += 16) {
+    // Load 16 bytes
+    __m128i vec_a = _mm_loadu_si128((__m128i*)(a_ptr + i));
+    __m128i vec_b = _mm_loadu_si128((__m128i*)(b_ptr + i));
 
-#else
-    // Square and add with fmadd
-    vec_sum = _mm256_fmadd_ps(diff, diff, vec_sum);
-#endif
+    // Zero extend 8bit to 16bit ints
+    __m256i a_shorts = _mm256_cvtepu8_epi16(vec_a);
+    __m256i b_shorts = _mm256_cvtepu8_epi16(vec_b);
+
+    // Subtract -- the difference of two uint8_t fits in an int16_t
+    __m256i diff = _mm256_sub_epi16(a_shorts, b_shorts);
+
+    // Square, add adjacent pairs into 32bit ints, and accumulate
+    vec_sum = _mm256_add_epi32(vec_sum, _mm256_madd_epi16(diff, diff));
   }
 
+  // Convert to floats before combining lanes, whose total may exceed int32_t
+  __m256 float_sum = _mm256_cvtepi32_ps(vec_sum);
+
   // 8 to 4
-  __m128 lo = _mm256_castps256_ps128(vec_sum);
-  __m128 hi = _mm256_extractf128_ps(vec_sum, 1);
+  __m128 lo = _mm256_castps256_ps128(float_sum);
+  __m128 hi = _mm256_extractf128_ps(float_sum, 1);
   __m128 combined = _mm_add_ps(lo, hi);
 
   // 4 to 2
@@ -628,6 +628,13 @@ class vamana_index {
     graph_ = ::detail::graph::adj_list<feature_type, id_type>(num_vectors_);
     // dump_edgelist("edges_" + std::to_string(0) + ".txt", graph_);
 
+    // An empty training set (e.g. when creating an empty index) has no
+    // medoid and no edges to build.
+    if (num_vectors_ == 0) {
+      medoid_ = 0;
+      return;
+    }
+
     medoid_ = medoid(feature_vectors_);
 
     // debug_index();
@@ -596,10 +596,6 @@ auto count_intersections(const U& I, const V& groundtruth, size_t k_nn) {
       std::sort(begin(I[i]), end(I[i]));
       std::sort(begin(groundtruth[i]), begin(groundtruth[i]) + k_nn);
 
-      // @todo remove -- for debugging only
-      std::vector<size_t> x(begin(I[i]), end(I[i]));
-      std::vector<size_t> y(begin(groundtruth[i]), end(groundtruth[i]));
-
       total_intersected += std::set_intersection(
           begin(I[i]),
           end(I[i]),